@@ -22,6 +22,9 @@
 #     to each spot in the board from the top left, going right through each
 #     row, then down the rows to end at the bottom right
 
+#   - boards bigger than 9x9, such as 16x16 and 25x25, are also supported,
+#     with solution squares of 4x4 and 5x5 (see make_matrix)
+
 #   - additionally, each 3x3 solution square will be denoted by a tuple,
 #     as such
 # m = [[-----|-----|-----],
@@ -35,8 +38,10 @@
 #      [-----|-----|-----]]
 
 import copy
+import math
 import time
 import pyautogui
+from sudoku_dlx import *
 
 # Takes 81 numbers and produces a 9x9 matrix using those numbers, starting
 # from the top left corner, going across the columns in that row, then
@@ -51,13 +56,88 @@ def make_nine_by_nine(str):
         matrix.append(row)
     return matrix
 
+# Characters used for the values 0 to 35 on a board, where 0 is an empty
+# spot, so that a 16x16 board uses the values 1 to 9 and A to G
+value_chars = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Takes a board of any size and produces the square matrix for it, in the
+# same order as make_nine_by_nine
+#   - the board can be a string with one character per spot, using the
+#     characters in value_chars (in upper or lower case) or '.' for an empty
+#     spot, or a string of numbers separated by spaces or commas, which is
+#     needed for boards with values above 35
+#   - the number of spots must be n^4 for some n, so the board is n^2 by
+#     n^2 with solution squares of n by n, and no value can be above n^2
+#   - raises a ValueError if the string is not a board
+def make_matrix(str):
+    text = str.strip()
+    if " " in text or "," in text or "\n" in text:
+        tokens = text.replace(",", " ").split()
+        nums = [0 if token == "." else int(token) for token in tokens]
+    else:
+        nums = [0 if char == "." else value_chars.index(char.upper())
+                for char in text]
+    size = math.isqrt(len(nums))
+    box = math.isqrt(size)
+    if box < 1 or box ** 4 != len(nums):
+        raise ValueError("A board must have n^4 spots for some n.")
+    if max(nums) > size or min(nums) < 0:
+        raise ValueError("A value on the board is bigger than the board.")
+    return [nums[i*size:(i+1)*size] for i in range(size)]
+
+# Takes a matrix and produces the string of numbers that it was made from,
+# undoing make_nine_by_nine, or make_matrix for boards up to 35x35
+def make_string(matrix):
+    if len(matrix) <= 9:
+        return "".join([str(num) for row in matrix for num in row])
+    return "".join([value_chars[num] for row in matrix for num in row])
+
+
+# This class holds the layout of a board with solution squares of box by
+# box spots, which is the same for every board of that size
+#   - size is the number of rows and columns, and all_digits is a bitmask
+#     with one bit set for each of the values 1 to size
+#   - box_of[r][c] is the 0-indexed solution square that the 0-indexed spot
+#     (r, c) falls into, going right through the squares then down
+#   - units has the 0-indexed (row, column) spots in each row, then each
+#     column, then each solution square
+#   - unit_indexes has the same spots as units, as the indexes r * size + c
+class BoardShape():
+    def __init__(self, box):
+        size = box * box
+        self.box = box
+        self.size = size
+        self.all_digits = (1 << size) - 1
+        self.box_of = [[(r // box) * box + c // box for c in range(size)]
+                       for r in range(size)]
+        self.units = [[(r, c) for c in range(size)] for r in range(size)] + \
+                     [[(r, c) for r in range(size)] for c in range(size)] + \
+                     [[(r, c) for r in range(size) for c in range(size)
+                       if self.box_of[r][c] == b] for b in range(size)]
+        self.unit_indexes = [[r * size + c for (r, c) in unit]
+                             for unit in self.units]
+
+
+# The BoardShape for each size of solution square used so far
+shapes = {}
+
+
+# Produces the BoardShape for boards with solution squares of box by box
+def board_shape(box):
+    if box not in shapes:
+        shapes[box] = BoardShape(box)
+    return shapes[box]
+
 # This class generates an empty Board, or a 9x9 matrix with all 0's
+#   - any other board given is made into a matrix by make_matrix, and shape
+#     is its BoardShape
 class EmptyBoard():
     empty_board1 = "00000000000000000000000000000000000000000000000000000000"
     empty_board2 = empty_board1 + "0000000000000000000000000"
     def __init__(self, board = empty_board2):
-        empty_matrix = make_nine_by_nine(board)
+        empty_matrix = make_matrix(board)
         self.board = copy.copy(empty_matrix)
+        self.shape = board_shape(math.isqrt(len(self.board)))
 
     def __str__(self):
         display = ""
@@ -72,7 +152,8 @@ class EmptyBoard():
         try:
             self.board[r-1][c-1] = v
         except IndexError:
-            print("ERROR: A 9x9 board only has 9 rows and columns.")
+            print("ERROR: A {0}x{0} board only has {0} rows and "
+                  "columns.".format(len(self.board)))
 
     # Gets a value from a given row-col location on the board
     def get_value(self, row_col):
@@ -80,10 +161,127 @@ class EmptyBoard():
         return self.board[r-1][c-1]
 
 
+# Table for bytes.translate that turns the characters '0' to '9' into the
+# numbers 0 to 9, '.' into 0, and every other character into 255
+digit_table = bytes([i - ord("0") if ord("0") <= i <= ord("9") else
+                     0 if i == ord(".") else 255 for i in range(256)])
+# Table for bytes.translate that turns the numbers 0 to 9 back into the
+# characters '0' to '9'
+char_table = bytes([ord("0") + i if i <= 9 else ord("?") for i in range(256)])
+
+
+# This class is a board like EmptyBoard that uses as little memory as
+# possible, for holding very many boards at once
+#   - the board is kept as a flat bytearray of 81 numbers, with the spot
+#     (r, c) at index (r - 1) * 9 + (c - 1), instead of a list of 9 lists
+#   - __slots__ stops each board from having its own dictionary
+#   - add_value and get_value work the same as in EmptyBoard
+class CompactBoard():
+    __slots__ = ("cells",)
+
+    def __init__(self, board = EmptyBoard.empty_board2):
+        cells = bytearray(board, "ascii").translate(digit_table)
+        if len(cells) != 81 or max(cells) > 9:
+            raise ValueError("A board must be 81 digits from 0 to 9.")
+        self.cells = cells
+
+    def __str__(self):
+        display = ""
+        for row in self.to_matrix():
+            display = display + str(row) + "\n"
+        return display
+
+    # Takes a value in the form of (row, column, value) and replaces the
+    # spot (row, column) in the board with value
+    def add_value(self, value):
+        (r,c,v) = value
+        if not (1 <= r <= 9 and 1 <= c <= 9):
+            print("ERROR: A 9x9 board only has 9 rows and columns.")
+            return
+        self.cells[(r-1)*9 + (c-1)] = v
+
+    # Gets a value from a given row-col location on the board
+    def get_value(self, row_col):
+        (r,c) = row_col
+        return self.cells[(r-1)*9 + (c-1)]
+
+    # Produces the string of 81 digits for the board
+    def to_string(self):
+        return self.cells.translate(char_table).decode("ascii")
+
+    # Produces the board as a 9x9 matrix, as used by EmptyBoard
+    def to_matrix(self):
+        return [list(self.cells[i:i + 9]) for i in range(0, 81, 9)]
+
+
 # This class is a sudoku board, adding functions such as testing for the
 # correctness of rows and columns according to sudoku rules
+#   - the board keeps count of how many times each value appears in each
+#     row, column and solution square, and of how many values appear more
+#     than once, so that checking the rules takes constant time
+#   - the counts are kept up to date by add_value, so any other change to
+#     self.board must be followed by a call to make_counts
 class SudokuBoard(EmptyBoard):
-    pass
+    def __init__(self, board = EmptyBoard.empty_board2):
+        EmptyBoard.__init__(self, board)
+        self.make_counts()
+
+    # Builds the counts of the values in each row, column and solution
+    # square from self.board
+    #   - row_counts[r][v] is the number of times the value v appears in
+    #     the 0-indexed row r, and row_dups[r] is the number of values that
+    #     appear more than once in that row, and likewise for columns and
+    #     solution squares (numbered as in BoardShape)
+    #   - duplicates is the total of row_dups, col_dups and box_dups
+    def make_counts(self):
+        size = self.shape.size
+        self.row_counts = [[0] * (size + 1) for i in range(size)]
+        self.col_counts = [[0] * (size + 1) for i in range(size)]
+        self.box_counts = [[0] * (size + 1) for i in range(size)]
+        self.row_dups = [0] * size
+        self.col_dups = [0] * size
+        self.box_dups = [0] * size
+        self.duplicates = 0
+        for r in range(size):
+            for c in range(size):
+                self.count_value(r, c, self.board[r][c], 1)
+
+    # Changes the counts for the value v at the 0-indexed spot (r, c) by
+    # change, which is 1 when v is added and -1 when v is removed
+    def count_value(self, r, c, v, change):
+        if v == 0:
+            return
+        self.count_unit(self.row_counts, self.row_dups, r, v, change)
+        self.count_unit(self.col_counts, self.col_dups, c, v, change)
+        self.count_unit(self.box_counts, self.box_dups,
+                        self.shape.box_of[r][c], v, change)
+
+    # Changes the count of the value v in unit i of counts by change, and
+    # updates dups and duplicates if v starts or stops appearing more than
+    # once in that unit
+    def count_unit(self, counts, dups, i, v, change):
+        n = counts[i][v]
+        if change == 1 and n == 1:
+            dups[i] += 1
+            self.duplicates += 1
+        elif change == -1 and n == 2:
+            dups[i] -= 1
+            self.duplicates -= 1
+        counts[i][v] = n + change
+
+    # Takes a value in the form of (row, column, value) and replaces the
+    # spot (row, column) in self.board with value, updating the counts
+    def add_value(self, value):
+        (r,c,v) = value
+        try:
+            orig_value = self.board[r-1][c-1]
+        except IndexError:
+            print("ERROR: A {0}x{0} board only has {0} rows and "
+                  "columns.".format(len(self.board)))
+            return
+        self.count_value(r-1, c-1, orig_value, -1)
+        self.board[r-1][c-1] = v
+        self.count_value(r-1, c-1, v, 1)
 
     # This function allows us to add multiple values at the same time
     def add_values(self, values = []):
@@ -94,31 +292,19 @@ class SudokuBoard(EmptyBoard):
     # This function will return True if a row has no duplicate numbers, and
     # false otherwise
     def row_good(self, row):
-        row_list = self.board[row-1]
-        return is_unique(row_list)
+        return self.row_dups[row-1] == 0
 
     # This function returns True if a given column has no duplicate numbers,
     # and false otherwise
     def column_good(self, column):
-        column_values = []
-        for row in self.board:
-            column_values.append(row[column - 1])
-        return is_unique(column_values)
+        return self.col_dups[column-1] == 0
 
     # This function returns True if the solution square for which a number
     # at a given row, column pair falls into has no duplicate values, and
     # false otherwise
     def square_good(self, row_column):
         (r, c) = row_column
-        # Thus calculates the tuple identifying the solution square, as
-        # described earlier
-        (ssquare_row, ssquare_col) = ((r-1)//3, (c-1)//3)
-        ssquare_values = []
-        # Collects all the values in a given solution square
-        for row in range(ssquare_row * 3, ssquare_row * 3 + 3):
-            for col in range(ssquare_col * 3, ssquare_col * 3 + 3):
-                ssquare_values.append(self.board[row][col])
-        return is_unique(ssquare_values)
+        return self.box_dups[self.shape.box_of[r-1][c-1]] == 0
 
     # This function returns True if the adding the value value means that the
     # board remains valid or False if sudoku rules have been violated
@@ -131,24 +317,28 @@ class SudokuBoard(EmptyBoard):
         self.add_value((r,c,orig_value))
         return can_add
 
+    # This function returns True if the value in the form (row, column,
+    # value) can be placed on the board without it appearing twice in its
+    # row, column or solution square, or False otherwise
+    #   - unlike add_confirm, this does not look at duplicates of other
+    #     values that are already on the board
+    def can_place(self, value):
+        (r,c,v) = value
+        if v == 0:
+            return True
+        (r, c) = (r-1, c-1)
+        # The value at (r, c) itself is not counted if it is already v
+        same = 1 if self.board[r][c] == v else 0
+        return self.row_counts[r][v] == same and \
+            self.col_counts[c][v] == same and \
+            self.box_counts[self.shape.box_of[r][c]][v] == same
+
     # Determines if the initial board has any repeating numbers, that is
     # is not a valid board before inputs
     #   - will return false if any of the rows, columns, or solution squares
     #     has duplicate numbers, or false otherwise
     def board_good(self):
-        for row in range(1,10):
-            if self.row_good(row) == False:
-                return False
-        for col in range(1,10):
-            if self.column_good(col) == False:
-                return False
-        # List of one square row_col pair from each solution square
-        row_col_pairs = [(1,1), (4,1), (7,1), (1,4), (4,4), (7,4), (1,7),
-                         (4,7), (7,7)]
-        for pair in row_col_pairs:
-            if self.square_good(pair) == False:
-                return False
-        return True
+        return self.duplicates == 0
 
 # This function determines if all non-zero numbers in a given list are unique
 def is_unique(lon):
@@ -160,6 +350,80 @@ def is_unique(lon):
     return True
 
 
+# This class is the type of GAVE_UP, which is returned by the solver instead
+# of True or False when it runs out of time or nodes before it finds out if
+# a board is solvable
+#   - GAVE_UP counts as False in an if statement, so it is treated like an
+#     unsolvable board by code that only checks for True or False
+class GaveUp():
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "GAVE_UP"
+
+GAVE_UP = GaveUp()
+
+
+# This class records how the solver went about solving boards, to help find
+# out why a board was slow to solve
+#   - the counts are:
+#       - nodes: the number of guessed spots
+#       - backtracks: the number of guessed spots where every value was
+#         tried without finding a solution
+#       - max_depth: the most guesses made at once
+#       - candidates_tried: the number of values tried at guessed spots
+#       - propagated: the number of spots in the solution that were filled
+#         in without guessing
+#       - guessed: the number of spots in the solution that were guessed
+#     and for boards solved with "dlx", a guessed spot is a row tried in the
+#     cover matrix
+#   - the times are in seconds, for making the board from its string of 81
+#     digits (parse_time, only if recorded by the caller), checking it with
+#     board_good (validate_time), and solving it (search_time)
+#   - passing the same SolveStats to several solves adds up their counts
+#     and times, except max_depth which is the largest of them
+class SolveStats():
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.candidates_tried = 0
+        self.propagated = 0
+        self.guessed = 0
+        self.parse_time = 0.0
+        self.validate_time = 0.0
+        self.search_time = 0.0
+
+    def __str__(self):
+        display = ""
+        for (name, value) in self.as_dict().items():
+            display = display + "{0}: {1}\n".format(name, value)
+        return display
+
+    # Produces a dictionary of all of the counts and times
+    def as_dict(self):
+        return dict(vars(self))
+
+    # Adds the counts from one search of SudokuAI.search
+    def add_search(self, nodes, backtracks, max_depth, candidates_tried,
+                   propagated, guessed):
+        self.nodes += nodes
+        self.backtracks += backtracks
+        self.max_depth = max(self.max_depth, max_depth)
+        self.candidates_tried += candidates_tried
+        self.propagated += propagated
+        self.guessed += guessed
+
+    # Adds the counts from the last search of a DancingLinks cover matrix
+    def add_dlx(self, links):
+        self.nodes += links.nodes
+        self.backtracks += links.backtracks
+        self.max_depth = max(self.max_depth, links.max_depth)
+        self.candidates_tried += links.nodes
+        self.guessed += links.guessed
+
+
 # This class will contain all relevant functions to automatically solving a
 # sudoku board
 class SudokuAI(SudokuBoard):
@@ -173,38 +437,310 @@ class SudokuAI(SudokuBoard):
         (r, c) = row_col
         # Converts the user-input rows and columns to the user input
         (ind_r, ind_c) = (r-1, c-1)
-        for rest_rows in range(ind_r, 9):
-            for cols in range(0, 9):
+        size = len(self.board)
+        for rest_rows in range(ind_r, size):
+            for cols in range(0, size):
                 if rest_rows == ind_r and cols <= ind_c:
                     continue
                 elif self.board[rest_rows][cols] == 0:
                     return (rest_rows + 1, cols + 1)
         return True
 
-    # This function determines all possible values that could occupy the
-    # position in the table at row_col, returns True if one of the values
-    # from 1 to 9 fits as well as if one of the values from 1 to 9 fits the
-    # next spot where there is a 0 in the table
+    # Builds the bitmasks of the digits already used in each row, column and
+    # solution square of the board, where bit (v - 1) of a mask is set if
+    # the value v is used in that row, column or solution square
+    #   - the masks are indexed from 0, and the solution squares are
+    #     numbered going right through the squares then down, as in
+    #     BoardShape
+    #   - box_of and all_digits are also copied from the BoardShape, as they
+    #     are used for every spot the solver looks at
+    def make_masks(self):
+        size = self.shape.size
+        self.box_of = self.shape.box_of
+        self.all_digits = self.shape.all_digits
+        self.row_masks = [0] * size
+        self.col_masks = [0] * size
+        self.box_masks = [0] * size
+        for r in range(size):
+            for c in range(size):
+                v = self.board[r][c]
+                if v == 0:
+                    continue
+                bit = 1 << (v - 1)
+                self.row_masks[r] |= bit
+                self.col_masks[c] |= bit
+                self.box_masks[self.box_of[r][c]] |= bit
+
+    # Produces the bitmask of all values that can be placed at the 0-indexed
+    # spot (r, c) without breaking the rules, using the masks from make_masks
+    def candidates(self, r, c):
+        return ~(self.row_masks[r] | self.col_masks[c]
+                 | self.box_masks[self.box_of[r][c]]) & self.all_digits
+
+    # Places the value v at the 0-indexed spot (r, c) and marks it as used
+    # in the masks
+    #   - for speed, this does not update the counts kept by SudokuBoard, so
+    #     make_counts is called once the board is solved
+    def place_value(self, r, c, v):
+        bit = 1 << (v - 1)
+        self.board[r][c] = v
+        self.row_masks[r] |= bit
+        self.col_masks[c] |= bit
+        self.box_masks[self.box_of[r][c]] |= bit
+
+    # Removes the value at the 0-indexed spot (r, c), undoing place_value
+    def remove_value(self, r, c):
+        bit = ~(1 << (self.board[r][c] - 1))
+        self.board[r][c] = 0
+        self.row_masks[r] &= bit
+        self.col_masks[c] &= bit
+        self.box_masks[self.box_of[r][c]] &= bit
+
+    # This function solves the rest of the board from the position in the
+    # table at row_col, returns True if one of the values fits every spot
+    # where there is a 0 in the table, or False otherwise
+    #   - this builds the masks and searches as solve_board does, as search
+    #     no longer needs row_col, and is kept so that code calling
+    #     try_value still works
     def try_value(self, row_col):
         # If the board is already solved, then this will just return True
         if row_col == True:
             return True
-        (r, c) = row_col
-        values = []
-        for num in range(1,10):
-            if self.add_confirm((r,c,num)):
-                values.append(num)
-        # Test if any of the values mean that all the subsequent 0 spots
-        # have a possible value
-        for value in values:
-            self.add_value((r, c, value))
-            if self.next_zero(row_col) == True:
-                return True
-            elif self.try_value(self.next_zero(row_col)) == True:
-                return True
-        # If none of the values work, reset the value to 0
-        self.add_value((r,c,0))
-        return False
+        self.make_masks()
+        board_works = self.search() > 0
+        if board_works:
+            self.make_counts()
+        return board_works
+
+    # Fills in every spot that can only hold one value, until there are no
+    # more such spots, adding the 0-indexed (row, column) of each spot filled
+    # in to the list filled, and returns False if it finds that the board
+    # cannot be solved, otherwise returns True
+    #   - a spot can only hold one value if there is only one value that fits
+    #     it (naked single), or if it is the only spot in a row, column or
+    #     solution square that a value fits (hidden single)
+    #   - make_masks must be called before the first call to this function
+    def propagate(self, filled):
+        board = self.board
+        size = self.shape.size
+        box_of = self.box_of
+        all_digits = self.all_digits
+        row_masks = self.row_masks
+        col_masks = self.col_masks
+        box_masks = self.box_masks
+        changed = True
+        while changed:
+            changed = False
+            # Fills in the naked singles, looking up the masks directly
+            # instead of calling candidates, as this is the busiest loop of
+            # the solver, and keeps the possible values of each empty spot
+            # in spot_values, indexed by r * size + c
+            spot_values = [0] * (size * size)
+            i = 0
+            for r in range(size):
+                row = board[r]
+                boxes = box_of[r]
+                for c in range(size):
+                    if row[c] == 0:
+                        values = ~(row_masks[r] | col_masks[c]
+                                   | box_masks[boxes[c]]) & all_digits
+                        if values == 0:
+                            return False
+                        if values & (values - 1) == 0:
+                            self.place_value(r, c, values.bit_length())
+                            filled.append((r, c))
+                            changed = True
+                        spot_values[i] = values
+                    i += 1
+            # Only looks for hidden singles once there are no naked singles
+            # left, so that spot_values is up to date
+            if changed:
+                continue
+            # Fills in the hidden singles, where once has the values that fit
+            # at least one spot in the unit and twice has the values that fit
+            # at least two spots in the unit
+            #   - once some are found, goes back to the naked singles, as
+            #     spot_values is no longer up to date
+            unit_masks = row_masks + col_masks + box_masks
+            for (unit, used) in zip(self.shape.unit_indexes, unit_masks):
+                once = 0
+                twice = 0
+                for i in unit:
+                    values = spot_values[i]
+                    twice |= once & values
+                    once |= values
+                # Some value has nowhere left to go in this unit
+                if once | used != all_digits:
+                    return False
+                singles = once & ~twice
+                if singles == 0:
+                    continue
+                for i in unit:
+                    if spot_values[i] & singles == 0:
+                        continue
+                    (r, c) = divmod(i, size)
+                    values = self.candidates(r, c) & singles
+                    if values == 0:
+                        continue
+                    # One spot cannot be the only place for two values
+                    if values & (values - 1) != 0:
+                        return False
+                    self.place_value(r, c, values.bit_length())
+                    filled.append((r, c))
+                    changed = True
+                break
+        return True
+
+    # Finds the 0-indexed empty spot on the board with the fewest possible
+    # values, and returns it as (row, column, values) where values is the
+    # bitmask from candidates, or returns None if there are no empty spots
+    #   - stops looking as soon as a spot with 0 or 1 possible values is
+    #     found, as no other spot can be more constrained
+    def fewest_candidates(self):
+        size = self.shape.size
+        best = None
+        best_count = size + 1
+        for r in range(size):
+            row = self.board[r]
+            for c in range(size):
+                if row[c] != 0:
+                    continue
+                values = self.candidates(r, c)
+                count = values.bit_count()
+                if count < best_count:
+                    best = (r, c, values)
+                    best_count = count
+                    if count <= 1:
+                        return best
+        return best
+
+    # Solves the rest of the board by backtracking, and returns the number
+    # of solutions found, stopping as soon as limit solutions are found
+    #   - if limit solutions are found, the board is left filled in with the
+    #     last one, otherwise the board is left unchanged
+    #   - mode chooses the empty spot that is tried next, as in solve_board:
+    #     with "order" the spots are tried from the top left to the bottom
+    #     right, and with "mrv" the spot with the fewest possible values is
+    #     tried next, and the spots found by propagate are filled in right
+    #     away without guessing
+    #   - instead of recursing, the guesses are kept on a stack of
+    #     [row, column, values left to try, length of trail], and trail is a
+    #     list of all of the spots filled in, so that they can be undone
+    #   - if deadline (a time from time.monotonic) passes, or more than
+    #     max_nodes values are tried at guessed spots, then the search stops
+    #     and returns GAVE_UP, with the board unchanged
+    #   - if stats is a SolveStats, the counts for this search are added to
+    #     it
+    #   - make_masks must be called before the first call to this function
+    def search(self, mode = "order", limit = 1, deadline = None,
+               max_nodes = None, stats = None):
+        board = self.board
+        stack = []
+        trail = []
+        count = 0
+        # Counts of the values tried at guessed spots, the guessed spots, the
+        # guessed spots that had all of their values tried, and the most
+        # guesses made at once
+        nodes = 0
+        expanded = 0
+        backtracks = 0
+        max_depth = 0
+        # In "order" mode the spot guessed at each depth is always the same,
+        # so the empty spots are only found once
+        if mode != "mrv":
+            size = self.shape.size
+            empty = [(r, c) for r in range(size) for c in range(size)
+                     if board[r][c] == 0]
+        while True:
+            # Finds the next spot to fill in, where values is 0 if there is
+            # no spot left to fill in or if the spot has no possible values
+            if mode == "mrv":
+                # Fills in every spot that does not need guessing first, and
+                # goes back to the last guess if it broke the rules
+                if not self.propagate(trail):
+                    spot = False
+                    values = 0
+                else:
+                    spot = self.fewest_candidates()
+                    if spot == None:
+                        values = 0
+                    else:
+                        (r, c, values) = spot
+            elif len(stack) == len(empty):
+                spot = None
+                values = 0
+            else:
+                spot = empty[len(stack)]
+                (r, c) = spot
+                values = self.candidates(r, c)
+            if spot == None:
+                # The board is filled in, so this is a solution
+                count += 1
+                if count >= limit:
+                    if stats != None:
+                        stats.add_search(expanded, backtracks, max_depth,
+                                         nodes, len(trail) - len(stack),
+                                         len(stack))
+                    return count
+            elif values != 0:
+                stack.append([r, c, values, len(trail)])
+                expanded += 1
+                if len(stack) > max_depth:
+                    max_depth = len(stack)
+            # Tries the next value of the most recent guess, going back to
+            # earlier guesses if all of its values have been tried
+            while stack:
+                frame = stack[-1]
+                (r, c, values, mark) = frame
+                while len(trail) > mark:
+                    (r2, c2) = trail.pop()
+                    self.remove_value(r2, c2)
+                if values == 0:
+                    stack.pop()
+                    backtracks += 1
+                    continue
+                # Checks that the search is still within its limits, only
+                # looking at the clock every 64 values
+                nodes += 1
+                if (max_nodes != None and nodes > max_nodes) or \
+                        (deadline != None and nodes % 64 == 0
+                         and time.monotonic() > deadline):
+                    for (r2, c2) in reversed(trail):
+                        self.remove_value(r2, c2)
+                    if stats != None:
+                        stats.add_search(expanded, backtracks, max_depth,
+                                         nodes - 1, 0, 0)
+                    return GAVE_UP
+                bit = values & -values
+                frame[2] = values ^ bit
+                self.place_value(r, c, bit.bit_length())
+                trail.append((r, c))
+                break
+            else:
+                # Every guess has been tried, so resets the spots that were
+                # filled in before the first guess
+                for (r, c) in reversed(trail):
+                    self.remove_value(r, c)
+                if stats != None:
+                    stats.add_search(expanded, backtracks, max_depth, nodes,
+                                     0, 0)
+                return count
+
+    # Counts the solutions to the board, stopping as soon as limit solutions
+    # have been found, so count_solutions(2) == 1 means that the board has
+    # exactly one solution
+    #   - the board is left unchanged
+    def count_solutions(self, limit = 2):
+        if self.board_good() == False:
+            return 0
+        original = [list(row) for row in self.board]
+        self.make_masks()
+        count = 0
+        if self.propagate([]):
+            count = self.search("mrv", limit)
+        self.board = original
+        self.make_masks()
+        return count
 
     # Finds the first 0 in the board
     def first_zero(self):
@@ -212,12 +748,63 @@ class SudokuAI(SudokuBoard):
 
     # Solves the instance of board, if it is solvable, and returns True,
     # otherwise returns False
-    def solve_board(self):
+    #   - before any guessing, every spot that can only hold one value is
+    #     filled in using propagate
+    #   - mode chooses which empty spot is tried next: "order" goes through
+    #     the spots from the top left to the bottom right, and "mrv" always
+    #     picks the spot with the fewest possible values
+    #   - mode can also be "dlx", which solves the board as an exact cover
+    #     problem with Dancing Links instead of backtracking (see sudoku_dlx)
+    #   - if time_limit seconds pass, or more than max_nodes values are
+    #     tried at guessed spots, before the board is solved or found to be
+    #     unsolvable, then this gives up and returns GAVE_UP instead, leaving
+    #     the board unchanged
+    #   - if stats is a SolveStats, the counts and times for this solve are
+    #     added to it
+    def solve_board(self, mode = "order", time_limit = None,
+                    max_nodes = None, stats = None):
+        if stats != None:
+            start = time.perf_counter()
         # If the board has duplicate numbers in row, columns, or solution
         # squares, will return false
-        if self.board_good() == False:
+        board_good = self.board_good()
+        if stats != None:
+            validated = time.perf_counter()
+            stats.validate_time += validated - start
+        if board_good == False:
             return False
-        board_works = self.try_value(self.first_zero())
+        deadline = None
+        if time_limit != None:
+            deadline = time.monotonic() + time_limit
+        if mode == "dlx":
+            board_works = solve_dlx(self.board, deadline, max_nodes, stats)
+            if stats != None:
+                stats.search_time += time.perf_counter() - validated
+            if board_works == None:
+                return GAVE_UP
+            if board_works:
+                self.make_counts()
+            return board_works
+        self.make_masks()
+        # Fills in all of the spots that do not need any guessing first, and
+        # only starts backtracking if there are still 0's left
+        filled = []
+        if not self.propagate(filled):
+            board_works = False
+        else:
+            board_works = self.search(mode, 1, deadline, max_nodes, stats)
+            if board_works != GAVE_UP:
+                board_works = board_works > 0
+        # If the board is unsolvable, resets the spots that were filled in
+        if not board_works:
+            for (r, c) in reversed(filled):
+                self.remove_value(r, c)
+        else:
+            self.make_counts()
+            if stats != None:
+                stats.propagated += len(filled)
+        if stats != None:
+            stats.search_time += time.perf_counter() - validated
         return board_works
 
     # Automatically inputs the solution using numbers and TAB
@@ -249,6 +836,10 @@ class SudokuAI(SudokuBoard):
         return
 
 
+# Number of seconds the solver is given to solve a board entered by the user
+solve_time_limit = 60
+
+
 # Runs the program where a board is asked as input and is solved
 def sudoku_main():
     matrix = str(input("Enter a sudoku board in the form of a list of 81 "
@@ -268,7 +859,7 @@ def sudoku_main():
     print('The board you entered is as follows:')
     print(user_board)
     print('Solving...')
-    board_works = user_board.solve_board()
+    board_works = user_board.solve_board("mrv", solve_time_limit)
     if board_works:
         print(user_board)
         want_input = str(input("Would you like the computer to "
@@ -280,6 +871,9 @@ def sudoku_main():
                                  " (Y or N): "))
         if another_step == "Y":
             sudoku_main()
+    elif board_works == GAVE_UP:
+        print("The board you entered took too long to solve.")
+        sudoku_main()
     else:
         print("The board you entered is unsolvable.")
         sudoku_main()
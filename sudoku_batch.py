@@ -0,0 +1,226 @@
+# Isaac Wen
+# This program solves a large number of sudoku puzzles in one run, reading
+# them line by line from a file (or the standard input) and writing the
+# solutions line by line to a file (or the standard output)
+
+# Each line of the input is a puzzle in the same 81 digit form used by
+# sudoku_backtracking.py, where '.' may also be used for an empty spot, and
+# each line of the output is the 81 digit solution to that puzzle
+#   - only one line is held in memory at a time, so files of any size can be
+#     solved
+#   - lines that are not valid puzzles, or that are unsolvable, are reported
+#     by line number on the standard error and do not stop the run, and an
+#     empty line is written in place of their solution, so that the nth
+#     line of the output is always the answer to the nth puzzle
+#   - blank lines are skipped
+#   - with --time-limit or --max-nodes, puzzles that take too long are
+#     given up on and reported as errors, so one puzzle cannot hold up the
+#     whole run
+#   - with --stats, the solver statistics for each puzzle (see SolveStats)
+#     are written to a file as lines of JSON, to find the puzzles that are
+#     slow to solve
+#   - the puzzles can be spread over several processes with --workers, in
+#     which case they are handed out in chunks of --chunksize lines, and the
+#     solutions are still written in the same order as the puzzles
+
+# Usage:
+#   python sudoku_batch.py puzzles.txt -o solutions.txt
+#   cat puzzles.txt | python sudoku_batch.py > solutions.txt
+#   python sudoku_batch.py puzzles.txt -o solutions.txt --workers 32
+
+import sys
+import json
+import time
+import argparse
+import itertools
+import collections
+import multiprocessing
+from sudoku_backtracking import *
+
+
+# Takes a line of input and produces the 81 digit puzzle on it, or raises a
+# ValueError if the line is not a puzzle
+def parse_puzzle(line):
+    puzzle = line.strip().replace(".", "0")
+    if len(puzzle) != 81 or not puzzle.isdigit():
+        raise ValueError("not a puzzle of 81 digits")
+    return puzzle
+
+
+# Solves a single 81 digit puzzle, and returns (solution, None) if it is
+# solvable, or (None, reason) if it is not
+#   - time_limit and max_nodes limit the solver as in SudokuAI.solve_board
+#   - if stats is a SolveStats, the counts and times for the solve are added
+#     to it
+def solve_puzzle(puzzle, mode = "mrv", time_limit = None, max_nodes = None,
+                 stats = None):
+    if stats != None:
+        start = time.perf_counter()
+    user_board = SudokuAI(puzzle)
+    if stats != None:
+        stats.parse_time += time.perf_counter() - start
+    if user_board.board_good() == False:
+        return (None, "invalid puzzle")
+    board_works = user_board.solve_board(mode, time_limit, max_nodes, stats)
+    if board_works == GAVE_UP:
+        return (None, "gave up")
+    if not board_works:
+        return (None, "unsolvable")
+    return (make_string(user_board.board), None)
+
+
+# Produces the tuple (line number, line, options) for each line of infile
+# that is not blank, where options is the tuple of the arguments to
+# solve_puzzle after the puzzle
+def read_lines(infile, options):
+    for (line_num, line) in enumerate(infile, 1):
+        if line.strip() == "":
+            continue
+        yield (line_num, line, options)
+
+
+# Solves the puzzle on a line given as (line number, line, options), and
+# returns (line number, solution, reason, stats) with solution and reason as
+# in solve_puzzle
+#   - options is (mode, time_limit, max_nodes, with_stats), and stats is the
+#     dictionary from SolveStats.as_dict if with_stats is True, or None
+def solve_line(numbered_line):
+    (line_num, line, options) = numbered_line
+    (mode, time_limit, max_nodes, with_stats) = options
+    stats = None
+    if with_stats:
+        stats = SolveStats()
+    try:
+        puzzle = parse_puzzle(line)
+        (solution, reason) = solve_puzzle(puzzle, mode, time_limit,
+                                          max_nodes, stats)
+    except ValueError as error:
+        (solution, reason) = (None, str(error))
+    if with_stats:
+        stats = stats.as_dict()
+    return (line_num, solution, reason, stats)
+
+
+# Solves a list of lines given as in solve_line, and returns a list of the
+# results
+def solve_chunk(chunk):
+    return [solve_line(numbered_line) for numbered_line in chunk]
+
+
+# Solves the lines given as in solve_line using a pool of (workers) processes,
+# and produces the results in the same order as the lines
+#   - the lines are sent to the processes chunksize at a time, and at most
+#     two chunks per process are read ahead, so only a few chunks are ever
+#     held in memory
+def solve_in_pool(lines, workers, chunksize):
+    with multiprocessing.Pool(workers) as pool:
+        pending = collections.deque()
+        more_lines = True
+        while True:
+            while more_lines and len(pending) < 2 * workers:
+                chunk = list(itertools.islice(lines, chunksize))
+                if chunk == []:
+                    more_lines = False
+                else:
+                    pending.append(pool.apply_async(solve_chunk, (chunk,)))
+            if len(pending) == 0:
+                return
+            for result in pending.popleft().get():
+                yield result
+
+
+# Solves every puzzle from the lines of infile, writing the solutions to
+# outfile (with an empty line for each error) and the errors to errfile, and
+# returns the pair (number solved, number of errors)
+#   - if workers is more than 1, the puzzles are solved by that many
+#     processes at the same time
+#   - time_limit and max_nodes limit the solver for each puzzle, as in
+#     SudokuAI.solve_board
+#   - if statsfile is given, a line of JSON with the line number, the
+#     result and the SolveStats counts and times is written to it for each
+#     puzzle
+def solve_stream(infile, outfile, errfile = sys.stderr, mode = "mrv",
+                 workers = 1, chunksize = 64, time_limit = None,
+                 max_nodes = None, statsfile = None):
+    options = (mode, time_limit, max_nodes, statsfile != None)
+    lines = read_lines(infile, options)
+    if workers > 1:
+        results = solve_in_pool(lines, workers, chunksize)
+    else:
+        results = map(solve_line, lines)
+    solved = 0
+    errors = 0
+    for (line_num, solution, reason, stats) in results:
+        if statsfile != None:
+            stats["line"] = line_num
+            stats["result"] = reason or "solved"
+            statsfile.write(json.dumps(stats) + "\n")
+        if solution == None:
+            errfile.write("line {0}: {1}\n".format(line_num, reason))
+            outfile.write("\n")
+            errors += 1
+        else:
+            outfile.write(solution + "\n")
+            solved += 1
+    return (solved, errors)
+
+
+# Runs the program from the command line
+def batch_main(argv = None):
+    parser = argparse.ArgumentParser(
+        description="Solve sudoku puzzles, one 81 digit puzzle per line.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file of puzzles, or - for the standard input")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file for the solutions, or - for the standard "
+                             "output")
+    parser.add_argument("-m", "--mode", default="mrv",
+                        choices=["order", "mrv", "dlx"],
+                        help="solver to use (see SudokuAI.solve_board)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of processes to solve with, or 0 for "
+                             "one per CPU core")
+    parser.add_argument("--chunksize", type=int, default=64,
+                        help="number of puzzles sent to a process at a time")
+    parser.add_argument("-t", "--time-limit", type=float, default=None,
+                        help="seconds to spend on a puzzle before giving up")
+    parser.add_argument("-n", "--max-nodes", type=int, default=None,
+                        help="guesses to make on a puzzle before giving up")
+    parser.add_argument("-s", "--stats", default=None,
+                        help="file to write the solver statistics for each "
+                             "puzzle to, as lines of JSON")
+    args = parser.parse_args(argv)
+    workers = args.workers
+    if workers == 0:
+        workers = multiprocessing.cpu_count()
+
+    if args.input == "-":
+        infile = sys.stdin
+    else:
+        infile = open(args.input)
+    if args.output == "-":
+        outfile = sys.stdout
+    else:
+        outfile = open(args.output, "w")
+    statsfile = None
+    if args.stats != None:
+        statsfile = open(args.stats, "w")
+    try:
+        (solved, errors) = solve_stream(infile, outfile, sys.stderr,
+                                        args.mode, workers, args.chunksize,
+                                        args.time_limit, args.max_nodes,
+                                        statsfile)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+        if statsfile != None:
+            statsfile.close()
+    sys.stderr.write("Solved {0} puzzles, {1} errors.\n".format(solved,
+                                                               errors))
+    return errors == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if batch_main() else 1)
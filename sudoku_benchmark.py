@@ -0,0 +1,149 @@
+# Isaac Wen
+# This program measures how fast each of the solvers in sudoku_backtracking.py
+# solves the sets of puzzles in the puzzles folder, and reports the results
+# as JSON so that two runs can be compared
+
+# The sets of puzzles, or tiers, are text files with one 81 digit puzzle per
+# line:
+#   - easy.txt: puzzles that can be solved without any guessing
+#   - evil.txt: puzzles with few numbers that need guessing, like the "evil"
+#     puzzles from websudoku
+#   - minimal17.txt: puzzles with only 17 numbers, the fewest that a sudoku
+#     puzzle with one solution can have
+#   - anti_backtracking.txt: puzzles known to be hard for backtracking from
+#     the top left, such as the one from the Wikipedia article on sudoku
+#     solving algorithms and Arto Inkala's puzzle, as well as others
+#     relabelled so that the first row of the solution is 987654321
+#   - every puzzle has exactly one solution
+
+# For each tier and each solver mode, the report has the number of puzzles
+# solved and given up on, the puzzles solved per second, the 50th and 99th
+# percentile time to solve a puzzle in milliseconds, and the mean and
+# largest number of guessed spots (see SolveStats)
+
+# Usage:
+#   python sudoku_benchmark.py -o before.json
+#   python sudoku_benchmark.py --modes mrv dlx --tiers evil --repeat 5
+
+import os
+import json
+import time
+import platform
+import argparse
+from sudoku_backtracking import *
+
+# Folder that the tiers of puzzles are kept in
+puzzle_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "puzzles")
+
+# Tiers and solver modes that are benchmarked by default
+all_tiers = ["easy", "evil", "minimal17", "anti_backtracking"]
+all_modes = ["order", "mrv", "dlx"]
+
+
+# Produces the list of puzzles in the given tier
+def load_tier(tier):
+    puzzles = []
+    with open(os.path.join(puzzle_folder, tier + ".txt")) as tier_file:
+        for line in tier_file:
+            puzzle = line.strip()
+            if puzzle != "":
+                puzzles.append(puzzle)
+    return puzzles
+
+
+# Produces the value below which the fraction p of the sorted list of
+# numbers values fall
+def percentile(values, p):
+    if values == []:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(p * len(values))) - 1))
+    return values[index]
+
+
+# Solves every puzzle in puzzles repeat times with the given solver mode,
+# giving up on a puzzle after time_limit seconds, and produces a dictionary
+# of the results
+#   - raises a ValueError if a solution is wrong, as then the timing would
+#     be meaningless
+def run_benchmark(puzzles, mode, repeat = 1, time_limit = 10):
+    times = []
+    nodes = []
+    solved = 0
+    gave_up = 0
+    for i in range(repeat):
+        for puzzle in puzzles:
+            stats = SolveStats()
+            user_board = SudokuAI(puzzle)
+            givens = make_string(user_board.board)
+            start = time.perf_counter()
+            board_works = user_board.solve_board(mode, time_limit, None,
+                                                 stats)
+            times.append(time.perf_counter() - start)
+            nodes.append(stats.nodes)
+            if board_works == GAVE_UP:
+                gave_up += 1
+                continue
+            solution = make_string(user_board.board)
+            # The solution must fill every spot, keep every given value
+            # and have no duplicates
+            kept = all(g == "0" or g == v for (g, v) in zip(givens, solution))
+            if not board_works or "0" in solution or not kept or \
+                    SudokuBoard(solution).board_good() == False:
+                raise ValueError("wrong solution to " + puzzle)
+            solved += 1
+    total_time = sum(times)
+    times.sort()
+    results = {"puzzles": len(times),
+               "solved": solved,
+               "gave_up": gave_up,
+               "puzzles_per_sec": len(times) / total_time if total_time else 0,
+               "p50_ms": percentile(times, 0.50) * 1000,
+               "p99_ms": percentile(times, 0.99) * 1000,
+               "mean_nodes": sum(nodes) / len(nodes) if nodes else 0,
+               "max_nodes": max(nodes) if nodes else 0}
+    return results
+
+
+# Runs the benchmark on each of the tiers with each of the solver modes, and
+# produces a dictionary of the results, along with details of the machine
+# that they were run on
+def benchmark_main(argv = None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the sudoku solvers on the puzzle tiers.")
+    parser.add_argument("--tiers", nargs="+", default=all_tiers,
+                        choices=all_tiers, help="tiers of puzzles to solve")
+    parser.add_argument("--modes", nargs="+", default=all_modes,
+                        choices=all_modes, help="solver modes to benchmark")
+    parser.add_argument("-r", "--repeat", type=int, default=1,
+                        help="number of times to solve each puzzle")
+    parser.add_argument("-t", "--time-limit", type=float, default=10,
+                        help="seconds to spend on a puzzle before giving up")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file for the JSON report, or - for the "
+                             "standard output")
+    args = parser.parse_args(argv)
+
+    report = {"python": platform.python_version(),
+              "machine": platform.machine(),
+              "repeat": args.repeat,
+              "time_limit": args.time_limit,
+              "tiers": {}}
+    for tier in args.tiers:
+        puzzles = load_tier(tier)
+        report["tiers"][tier] = {}
+        for mode in args.modes:
+            report["tiers"][tier][mode] = run_benchmark(puzzles, mode,
+                                                        args.repeat,
+                                                        args.time_limit)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w") as outfile:
+            outfile.write(text + "\n")
+    return report
+
+
+if __name__ == "__main__":
+    benchmark_main()
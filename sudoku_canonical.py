@@ -0,0 +1,330 @@
+# Isaac Wen
+# This program finds the canonical form of a 9x9 sudoku puzzle, so that
+# puzzles that are the same up to the symmetries of sudoku can be recognized,
+# and uses it to keep a cache of solved puzzles
+
+# The symmetries of sudoku are the changes to a board that always turn a
+# valid board into another valid board:
+#   - swapping rows within a band of three rows, or swapping whole bands,
+#     and the same for columns and stacks of three columns
+#   - transposing the board, so that the rows become the columns
+#   - relabelling, or swapping the values 1 to 9 for each other
+# Together these make 9! x 3,359,232 symmetries
+
+# For the design of this program, the canonical form of a puzzle is the
+# smallest 81 digit string out of all of the boards that it can be turned
+# into, where each board is relabelled so that the values appear in the
+# order 1, 2, 3, ... going through the board from the top left
+#   - as relabelling is then decided by the rows and columns, only the
+#     3,359,232 changes of rows and columns need to be searched, and they are
+#     searched one row at a time: every way of placing the first row that
+#     gives the smallest first row is kept, then every way of adding a second
+#     row to those that gives the smallest second row, and so on
+#   - every tie is kept, so the canonical form is exactly the same for every
+#     puzzle that can be turned into each other, and a puzzle usually only
+#     has a few ties after the first two rows
+#   - some puzzles, such as ones with whole rows of numbers and little else,
+#     have hundreds of thousands of ties and would take seconds, so the
+#     search gives up once there are more than max_states ties, and the
+#     puzzle is then solved without looking it up
+#   - most puzzles are solved in fewer guesses than it takes to find their
+#     canonical form, so SolveCache first tries to solve a puzzle with at
+#     most cheap_nodes guesses, and only looks it up if that is not enough
+
+# Usage:
+#   cache = SolveCache()
+#   solution = cache.solve(puzzle)
+
+import random
+import itertools
+import collections
+from sudoku_backtracking import *
+
+# Produces (key, orders) for placing row as the first row of the board,
+# where orders is the list of every order of the columns, keeping the stacks
+# together, that puts as many of the row's 0's first as possible, and key is
+# the list saying which spots of the row are filled in once it is in that
+# order
+#   - the first row always relabels to 1, 2, 3, ..., so only where its 0's
+#     are matters, and the best orders put the stacks with the most 0's
+#     first and the 0's first within each stack
+def first_row_orders(row):
+    # Every best order of the columns within each stack
+    within = []
+    for stack in range(3):
+        cols = range(stack * 3, stack * 3 + 3)
+        zeros = [c for c in cols if row[c] == 0]
+        others = [c for c in cols if row[c] != 0]
+        within.append((len(others),
+                       [list(zero_order) + list(other_order)
+                        for zero_order in itertools.permutations(zeros)
+                        for other_order in itertools.permutations(others)]))
+    key = []
+    for (filled, orders) in sorted(within):
+        key.extend([False] * (3 - filled) + [True] * filled)
+    orders = []
+    for stacks in itertools.permutations(range(3)):
+        counts = [within[stack][0] for stack in stacks]
+        if counts != sorted(counts):
+            continue
+        for parts in itertools.product(*[within[stack][1]
+                                         for stack in stacks]):
+            orders.append(parts[0] + parts[1] + parts[2])
+    return (key, orders)
+
+
+# Puzzles with fewer numbers than this cannot have only one solution, and
+# have so many ties that finding their canonical form would be very slow
+min_clues = 17
+
+# Most ties that canonical_form keeps before giving up, which is more than
+# any of the puzzles in the puzzles folder need
+max_states = 2000
+
+# Most guesses SolveCache makes on a puzzle before it looks it up instead
+cheap_nodes = 20
+
+
+# Relabels the values of row, taken in the order of the columns cols, using
+# labels, where labels[v] is the new value for the value v or 0 if v does
+# not have one yet, and returns (new row, labels, next label), giving new
+# values starting from next_label to values seen for the first time
+#   - labels is only copied if a new value is given, so it is never changed
+#   - if best is given, stops and returns None as soon as the new row is
+#     sure to be bigger than best
+def relabel_row(row, cols, labels, next_label, best = None):
+    new_row = []
+    copied = False
+    smaller = best == None
+    for c in cols:
+        v = row[c]
+        if v != 0 and labels[v] == 0:
+            if not copied:
+                labels = list(labels)
+                copied = True
+            labels[v] = next_label
+            next_label += 1
+        new_value = labels[v]
+        if not smaller:
+            best_value = best[len(new_row)]
+            if new_value > best_value:
+                return None
+            smaller = new_value < best_value
+        new_row.append(new_value)
+    return (tuple(new_row), labels, next_label)
+
+
+# Produces the (canonical form, transform) of the 81 digit puzzle, where
+# transform is (transposed, rows, cols, labels) such that the canonical form
+# is the puzzle transposed (if transposed is True), with its rows and columns
+# put in the orders rows and cols, and each value v changed to labels[v]
+#   - every value from 1 to 9 is given a label, even if it is not in the
+#     puzzle, so that transform can also be used on the solution
+#   - returns None instead if there are ever more than limit ties
+def canonical_form(puzzle, limit = max_states):
+    cells = [int(num) for num in puzzle.replace(".", "0")]
+    grids = ([cells[r * 9:r * 9 + 9] for r in range(9)],
+             [cells[c::9] for c in range(9)])
+    # Each state is (transposed, rows, cols, labels, next label) for a way
+    # of placing the rows so far that gives the smallest board so far
+    best = None
+    states = []
+    for transposed in (False, True):
+        for r in range(9):
+            (key, orders) = first_row_orders(grids[transposed][r])
+            if best == None or key < best:
+                best = key
+                states = []
+            if key == best:
+                states.extend([(transposed, [r], cols) for cols in orders])
+    if len(states) > limit:
+        return None
+    first_states = states
+    states = []
+    for (transposed, rows, cols) in first_states:
+        (first_row, labels, next_label) = relabel_row(
+            grids[transposed][rows[0]], cols, [0] * 10, 1)
+        states.append((transposed, rows, cols, labels, next_label))
+    canonical = list(first_row)
+    for r in range(1, 9):
+        best = None
+        next_states = []
+        for (transposed, rows, cols, labels, next_label) in states:
+            last_band = rows[-1] // 3
+            if r % 3 == 0:
+                choices = [row for row in range(9)
+                           if row // 3 not in [used // 3 for used in rows]]
+            else:
+                choices = [row for row in range(last_band * 3,
+                                                last_band * 3 + 3)
+                           if row not in rows]
+            for row in choices:
+                relabelled = relabel_row(grids[transposed][row], cols, labels,
+                                         next_label, best)
+                if relabelled == None:
+                    continue
+                (new_row, new_labels, new_next) = relabelled
+                if best == None or new_row < best:
+                    best = new_row
+                    next_states = []
+                if new_row == best:
+                    next_states.append((transposed, rows + [row], cols,
+                                        new_labels, new_next))
+        canonical.extend(best)
+        states = next_states
+        if len(states) > limit:
+            return None
+    (transposed, rows, cols, labels, next_label) = states[0]
+    # Gives the values that are not in the puzzle the labels that are left
+    for v in range(1, 10):
+        if labels[v] == 0:
+            labels[v] = next_label
+            next_label += 1
+    return ("".join([str(num) for num in canonical]),
+            (transposed, rows, cols, labels))
+
+
+# Produces a random transform, in the same form as the ones from
+# canonical_form, using rand as the source of random numbers
+def random_transform(rand = random):
+    bands = rand.sample(range(3), 3)
+    rows = [band * 3 + r for band in bands for r in rand.sample(range(3), 3)]
+    stacks = rand.sample(range(3), 3)
+    cols = [stack * 3 + c for stack in stacks
+            for c in rand.sample(range(3), 3)]
+    labels = [0] + rand.sample(range(1, 10), 9)
+    return (rand.random() < 0.5, rows, cols, labels)
+
+
+# Changes the 81 digit board by the transform from canonical_form
+def apply_transform(board, transform):
+    (transposed, rows, cols, labels) = transform
+    new_board = []
+    for r in rows:
+        for c in cols:
+            i = c * 9 + r if transposed else r * 9 + c
+            new_board.append(str(labels[int(board[i])]))
+    return "".join(new_board)
+
+
+# Changes the 81 digit board back by the transform from canonical_form,
+# undoing apply_transform
+def undo_transform(board, transform):
+    (transposed, rows, cols, labels) = transform
+    values = [0] * 10
+    for v in range(10):
+        values[labels[v]] = v
+    old_board = [0] * 81
+    for k in range(9):
+        for j in range(9):
+            (r, c) = (rows[k], cols[j])
+            i = c * 9 + r if transposed else r * 9 + c
+            old_board[i] = values[int(board[k * 9 + j])]
+    return "".join([str(num) for num in old_board])
+
+
+# This class keeps the solutions of puzzles by their canonical form, so
+# that a puzzle that is the same as one solved before up to the symmetries
+# of sudoku is looked up instead of solved
+#   - solutions maps each canonical form to its solution (or False if it is
+#     unsolvable), and also each puzzle seen to its own solution, so that a
+#     puzzle seen before does not need its canonical form found again
+#   - at most max_size solutions are kept, and the one used longest ago is
+#     forgotten first
+#   - hits and misses count the puzzles that were and were not found
+class SolveCache():
+    def __init__(self, max_size = 100000):
+        self.max_size = max_size
+        self.solutions = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # Solves the 81 digit puzzle as in SudokuAI.solve_board, and returns the
+    # 81 digit solution, False if it is unsolvable, or GAVE_UP if the solver
+    # took longer than time_limit seconds
+    #   - a puzzle that can be solved with at most cheap_nodes guesses is
+    #     solved straight away, and only the puzzle itself is kept
+    def solve(self, puzzle, mode = "mrv", time_limit = None):
+        puzzle = puzzle.replace(".", "0")
+        solution = self.lookup_exact(puzzle)
+        if solution != None:
+            return solution
+        solution = self.solve_board(puzzle, mode, time_limit, cheap_nodes)
+        if solution != GAVE_UP:
+            self.misses += 1
+            self.remember(puzzle, solution)
+            return solution
+        (solution, to_solve, transform) = self.lookup(puzzle)
+        if solution != None:
+            return solution
+        solution = self.solve_board(to_solve, mode, time_limit)
+        if solution == GAVE_UP:
+            return GAVE_UP
+        return self.finish(puzzle, to_solve, solution, transform)
+
+    # Produces the solution kept for the 81 digit puzzle itself, as returned
+    # by solve, or None if it is not in the cache
+    def lookup_exact(self, puzzle):
+        puzzle = puzzle.replace(".", "0")
+        if puzzle not in self.solutions:
+            return None
+        self.hits += 1
+        self.solutions.move_to_end(puzzle)
+        return self.solutions[puzzle]
+
+    # Produces (solution, to_solve, transform) for the 81 digit puzzle, where
+    # solution is its solution as returned by solve if it is in the cache, or
+    # None if it is not, in which case to_solve is the puzzle to solve and
+    # its solution should be given to finish with transform
+    #   - to_solve is the canonical form of the puzzle, except for puzzles
+    #     with fewer than min_clues numbers or too many ties, which are
+    #     solved as they are, with transform None
+    def lookup(self, puzzle):
+        puzzle = puzzle.replace(".", "0")
+        solution = self.lookup_exact(puzzle)
+        if solution != None:
+            return (solution, puzzle, None)
+        form = None
+        if 81 - puzzle.count("0") >= min_clues:
+            form = canonical_form(puzzle)
+        if form == None:
+            self.misses += 1
+            return (None, puzzle, None)
+        (canonical, transform) = form
+        if canonical not in self.solutions:
+            self.misses += 1
+            return (None, canonical, transform)
+        self.hits += 1
+        self.solutions.move_to_end(canonical)
+        solution = self.finish(puzzle, canonical, self.solutions[canonical],
+                               transform)
+        return (solution, canonical, transform)
+
+    # Keeps the solution (or False) to to_solve from lookup, and returns the
+    # solution to the puzzle itself
+    def finish(self, puzzle, to_solve, solution, transform):
+        puzzle = puzzle.replace(".", "0")
+        if transform != None:
+            self.remember(to_solve, solution)
+            if solution != False:
+                solution = undo_transform(solution, transform)
+        self.remember(puzzle, solution)
+        return solution
+
+    # Keeps the solution to the puzzle, forgetting the solution used longest
+    # ago if there are more than max_size
+    def remember(self, puzzle, solution):
+        self.solutions[puzzle] = solution
+        if len(self.solutions) > self.max_size:
+            self.solutions.popitem(last=False)
+
+    # Solves the 81 digit puzzle, returning the same as solve, or GAVE_UP
+    # if it needs more than max_nodes guesses
+    def solve_board(self, puzzle, mode, time_limit, max_nodes = None):
+        user_board = SudokuAI(puzzle)
+        board_works = user_board.solve_board(mode, time_limit, max_nodes)
+        if board_works == GAVE_UP:
+            return GAVE_UP
+        if not board_works:
+            return False
+        return make_string(user_board.board)
@@ -0,0 +1,311 @@
+# Isaac Wen
+# This program solves a given Sudoku board by treating it as an exact cover
+# problem and using Knuth's Algorithm X with Dancing Links
+
+# For the design of this program, a sudoku board is an exact cover problem
+# with 324 constraints (the columns of the cover matrix) and 729 choices (the
+# rows of the cover matrix):
+#   - every choice is a value v placed at a spot (r, c), and it fills the
+#     four constraints that:
+#       - the spot (r, c) has a value
+#       - row r has the value v
+#       - column c has the value v
+#       - the solution square of (r, c) has the value v
+#   - a solved board is a set of 81 choices that fills every constraint
+#     exactly once
+
+#   - the cover matrix is stored as a set of circular doubly linked lists,
+#     with each node being an index into the lists left, right, up, down and
+#     column, as such
+#       - node 0 is the root, nodes 1 to 324 are the column headers, and the
+#         rest are the 1's of the cover matrix
+#       - covering and uncovering a column only changes links, so the same
+#         cover matrix can be reused for every board after it is built
+
+
+import time
+
+
+# This class is a cover matrix stored as dancing links, along with the
+# functions used by Algorithm X to search it for an exact cover
+class DancingLinks():
+    # Creates the links for a cover matrix with num_columns columns, given a
+    # list of rows that each contain the columns (from 1 to num_columns) that
+    # have a 1 in that row
+    def __init__(self, num_columns, rows):
+        self.left = [i - 1 for i in range(num_columns + 1)]
+        self.right = [i + 1 for i in range(num_columns + 1)]
+        self.left[0] = num_columns
+        self.right[num_columns] = 0
+        self.up = list(range(num_columns + 1))
+        self.down = list(range(num_columns + 1))
+        self.column = list(range(num_columns + 1))
+        self.size = [0] * (num_columns + 1)
+        # The row of the cover matrix each node comes from, or -1 for the
+        # root and the column headers
+        self.row_of = [-1] * (num_columns + 1)
+        # The first node of each row of the cover matrix
+        self.row_start = []
+        # Limits on the search, as set by set_limits
+        self.set_limits()
+        for (row, columns) in enumerate(rows):
+            first = len(self.column)
+            self.row_start.append(first)
+            for (i, col) in enumerate(columns):
+                node = first + i
+                # Adds the node to the bottom of its column
+                self.up.append(self.up[col])
+                self.down.append(col)
+                self.down[self.up[col]] = node
+                self.up[col] = node
+                # Adds the node to the end of its row
+                self.left.append(first + (i - 1) % len(columns))
+                self.right.append(first + (i + 1) % len(columns))
+                self.column.append(col)
+                self.row_of.append(row)
+                self.size[col] += 1
+
+    # Removes the column col from the list of headers and removes every row
+    # with a 1 in col from all of the other columns
+    def cover(self, col):
+        (left, right, up, down) = (self.left, self.right, self.up, self.down)
+        (column, size) = (self.column, self.size)
+        right[left[col]] = right[col]
+        left[right[col]] = left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    # Puts back the column col, undoing cover
+    #   - columns must be uncovered in the opposite order to which they were
+    #     covered
+    def uncover(self, col):
+        (left, right, up, down) = (self.left, self.right, self.up, self.down)
+        (column, size) = (self.column, self.size)
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[col]] = col
+        left[right[col]] = col
+
+    # Chooses the row of the cover matrix that starts at the node first by
+    # covering all of the columns in that row, and returns False instead if
+    # one of the columns has already been covered
+    def select_row(self, first):
+        columns = []
+        j = first
+        while True:
+            columns.append(self.column[j])
+            j = self.right[j]
+            if j == first:
+                break
+        # A column that has been covered is no longer in the list of headers
+        for col in columns:
+            if self.right[self.left[col]] != col:
+                return False
+        for col in columns:
+            self.cover(col)
+        return True
+
+    # Undoes select_row for the row that starts at the node first
+    def unselect_row(self, first):
+        j = self.left[first]
+        while True:
+            self.uncover(self.column[j])
+            if j == first:
+                break
+            j = self.left[j]
+
+    # Limits the next searches to end by deadline (a time from
+    # time.monotonic) and to try at most max_nodes rows, where None means
+    # there is no limit, and resets the counts kept by search
+    #   - the counts are the rows tried (nodes), the columns where every row
+    #     was tried without finding a cover (backtracks), the most rows
+    #     chosen at once (max_depth), and the rows in the cover that was
+    #     found (guessed, set by the caller)
+    def set_limits(self, deadline = None, max_nodes = None):
+        self.deadline = deadline
+        self.nodes_left = max_nodes
+        self.gave_up = False
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.guessed = 0
+
+    # Searches for an exact cover of all the columns that are left, adding
+    # the rows chosen to solution, and returns True if one is found or False
+    # otherwise
+    #   - if the limits from set_limits are reached, the search stops,
+    #     returns False and sets gave_up to True
+    #   - the links are always put back the way they were before returning
+    #   - the columns chosen are kept on a stack instead of recursing, so
+    #     that boards of any size can be searched without reaching Python's
+    #     recursion limit
+    def search(self, solution):
+        (left, right, down) = (self.left, self.right, self.down)
+        (column, size, row_of) = (self.column, self.size, self.row_of)
+        # Each entry is [col, i] for a column that has been covered and the
+        # node i of the row being tried in it, or col itself before the
+        # first row has been tried
+        stack = []
+        found = False
+        while True:
+            if right[0] == 0:
+                found = True
+                break
+            # Chooses the column with the fewest 1's left
+            col = right[0]
+            best = col
+            while col != 0:
+                if size[col] < size[best]:
+                    best = col
+                col = right[col]
+            if size[best] != 0:
+                self.cover(best)
+                stack.append([best, best])
+            # Tries the next row of the last column chosen, going back to
+            # the column before it when it has no rows left
+            while stack != []:
+                entry = stack[-1]
+                (col, i) = entry
+                if i != col:
+                    j = left[i]
+                    while j != i:
+                        self.uncover(column[j])
+                        j = left[j]
+                    solution.pop()
+                    entry[1] = col
+                i = down[i]
+                if i == col:
+                    self.uncover(col)
+                    stack.pop()
+                    self.backtracks += 1
+                    continue
+                # Checks that the search is still within its limits, only
+                # looking at the clock every 256 rows
+                self.nodes += 1
+                if self.nodes_left != None:
+                    self.nodes_left -= 1
+                    if self.nodes_left < 0:
+                        self.gave_up = True
+                if self.deadline != None and self.nodes % 256 == 0 and \
+                        time.monotonic() > self.deadline:
+                    self.gave_up = True
+                if self.gave_up:
+                    break
+                entry[1] = i
+                solution.append(row_of[i])
+                if len(solution) > self.max_depth:
+                    self.max_depth = len(solution)
+                j = right[i]
+                while j != i:
+                    self.cover(column[j])
+                    j = right[j]
+                break
+            if stack == [] or self.gave_up:
+                break
+        # Puts the links back, keeping the rows of the cover in solution
+        while stack != []:
+            (col, i) = stack.pop()
+            if i != col:
+                j = left[i]
+                while j != i:
+                    self.uncover(column[j])
+                    j = left[j]
+            self.uncover(col)
+        return found
+
+
+# Produces the row of the cover matrix for a board with solution squares of
+# box by box spots, for placing the value v at the 0-indexed spot (r, c)
+#   - a board of size by size spots has 4 * size * size columns, in four
+#     groups of size * size for the spots, rows, columns and solution squares
+def sudoku_row(r, c, v, box = 3):
+    size = box * box
+    cells = size * size
+    b = (r // box) * box + c // box
+    return [1 + r * size + c,
+            1 + cells + r * size + (v - 1),
+            1 + 2 * cells + c * size + (v - 1),
+            1 + 3 * cells + b * size + (v - 1)]
+
+
+# The cover matrix for each size of solution square used so far
+covers = {}
+
+
+# Produces the cover matrix for a board with solution squares of box by box
+# spots, with the row for the value v at the 0-indexed spot (r, c) being row
+# ((r * size + c) * size + (v - 1))
+#   - each cover matrix is built once and reused for every board of its size
+def cover_matrix(box):
+    if box not in covers:
+        size = box * box
+        covers[box] = DancingLinks(4 * size * size,
+                                   [sudoku_row(r, c, v, box)
+                                    for r in range(size) for c in range(size)
+                                    for v in range(1, size + 1)])
+    return covers[box]
+
+
+# The cover matrix for a 9x9 sudoku board, with the row for the value v at
+# the 0-indexed spot (r, c) being row (r * 81 + c * 9 + (v - 1))
+sudoku_cover = cover_matrix(3)
+
+
+# Solves the square matrix board, filling in all of its 0's, and returns True
+# if it is solvable, otherwise returns False and leaves board unchanged
+#   - the board can be 9x9, 16x16 or any other size n^2 by n^2
+#   - if deadline (a time from time.monotonic) passes, or more than
+#     max_nodes rows are tried, before the board is solved, returns None
+#     instead and leaves board unchanged
+#   - if stats is a SolveStats, the counts for the search are added to it
+def solve_dlx(board, deadline = None, max_nodes = None, stats = None):
+    size = len(board)
+    links = cover_matrix(int(round(size ** 0.5)))
+    links.set_limits(deadline, max_nodes)
+    # Chooses the rows for all of the values already on the board
+    chosen = []
+    board_works = True
+    for r in range(size):
+        for c in range(size):
+            v = board[r][c]
+            if v == 0:
+                continue
+            first = links.row_start[(r * size + c) * size + (v - 1)]
+            if not links.select_row(first):
+                board_works = False
+                break
+            chosen.append(first)
+        if not board_works:
+            break
+    solution = []
+    try:
+        if board_works:
+            board_works = links.search(solution)
+    finally:
+        # Puts the cover matrix back so that it can be used for the next
+        # board, even if the search was interrupted
+        for first in reversed(chosen):
+            links.unselect_row(first)
+    if not links.gave_up:
+        links.guessed = len(solution)
+    if stats != None:
+        stats.add_dlx(links)
+    if links.gave_up:
+        return None
+    for row in solution:
+        board[row // (size * size)][(row // size) % size] = row % size + 1
+    return board_works
@@ -0,0 +1,260 @@
+# Isaac Wen
+# This program generates sudoku puzzles locally, without a network
+# connection, as a replacement for getting them from nine.websudoku.com with
+# sudoku_scraper.py
+
+# For the design of this program, a puzzle is made in two steps:
+#   - a random solution is made by filling the three solution squares on the
+#     diagonal with random orders of 1 to 9, which can never break the rules
+#     as they share no rows or columns, and solving the rest of the board
+#   - numbers are then taken off of the solution in a random order, and a
+#     number is put back if taking it off would give the puzzle more than
+#     one solution, until the puzzle has as few numbers as its difficulty
+#     asks for
+#   - the puzzle is then rated with sudoku_grader.py, as the number of
+#     numbers left on its own says little about how hard a puzzle is, and
+#     is kept as a seed of whichever difficulty rating_level gives, even if
+#     that is not the difficulty that was asked for
+
+#   - if the number taken off would be filled straight back in by
+#     propagate, the puzzle still has one solution and nothing more is
+#     checked
+#   - otherwise, for the easier difficulties the puzzle must still be
+#     solvable by propagate alone, which means it has exactly one solution,
+#     and for the harder difficulties, where guessing is allowed, a search
+#     is made for a solution with a different number in that spot
+
+# Making and rating a puzzle this way takes from a few milliseconds to over
+# a hundred for the rarer difficulties, so instead of making a new puzzle
+# every time, each seed is used for reuse puzzles:
+#   - a puzzle is made from a random seed of the difficulty asked for by
+#     changing it with a random symmetry of sudoku (see sudoku_canonical.py),
+#     which gives a puzzle that looks nothing like the seed, but needs the
+#     same techniques, so it has the same rating
+#   - a new seed is only made once the seeds of that difficulty have been
+#     used reuse times each, and each difficulty keeps its last seed_count
+#     seeds
+#   - this makes about 270 puzzles per second of difficulty 3, which is the
+#     rarest, and more of the other difficulties, on one core
+
+# Usage:
+#   (puzzle, solution) = get_puzzle(3)
+#   generator = PuzzleGenerator(random.Random(1))
+#   (puzzle, solution, rating) = generator.get_rated(3)
+
+import random
+from sudoku_backtracking import *
+from sudoku_grader import grade_puzzle, rating_level
+from sudoku_canonical import apply_transform, random_transform
+
+# For each difficulty from 1 to 4, the number of numbers to leave on the
+# board, and whether solving the puzzle may need guessing, chosen so that as
+# many of the puzzles made as possible have that difficulty
+levels = {1: (36, False),
+          2: (26, False),
+          3: (26, True),
+          4: (24, True)}
+
+# Number of puzzles made from each seed, as described above
+reuse = 32
+
+# Number of seeds kept for each difficulty
+seed_count = 32
+
+# Number of seeds made for one puzzle before giving up, so that get_puzzle
+# cannot run forever
+max_seeds = 1000
+
+
+# Produces a SudokuAI with a random solved board, using rand as the source
+# of random numbers
+def random_solution(rand = random):
+    board = SudokuAI()
+    for b in range(3):
+        values = rand.sample(range(1, 10), 9)
+        for i in range(9):
+            board.add_value((b * 3 + i // 3 + 1, b * 3 + i % 3 + 1,
+                             values[i]))
+    board.solve_board("mrv")
+    return board
+
+
+# Returns True if the value v, just taken off of the 0-indexed spot (r, c),
+# is the only value that fits there, or if no other empty spot in its row,
+# column or solution square can have v, so it would be filled straight back
+# in by propagate
+#   - make_masks must have been called on board
+def is_single(board, r, c, v):
+    bit = 1 << (v - 1)
+    if board.candidates(r, c) == bit:
+        return True
+    b = board.box_of[r][c]
+    for unit in (board.shape.units[r], board.shape.units[9 + c],
+                 board.shape.units[18 + b]):
+        hidden = True
+        for (r2, c2) in unit:
+            if (r2, c2) != (r, c) and board.board[r2][c2] == 0 and \
+                    board.candidates(r2, c2) & bit:
+                hidden = False
+                break
+        if hidden:
+            return True
+    return False
+
+
+# Returns True if every empty spot on the board can be filled in by
+# propagate alone, which means the board has exactly one solution, leaving
+# the board unchanged
+#   - make_masks must have been called on board
+def singles_solvable(board, empty):
+    filled = []
+    solvable = board.propagate(filled) and len(filled) == empty
+    for (r, c) in reversed(filled):
+        board.remove_value(r, c)
+    return solvable
+
+
+# Returns True if the board has a solution with some value other than v at
+# the 0-indexed spot (r, c), where v is the value from the solution that the
+# board was made from, so the board has more than one solution
+#   - this only has to search the other values at (r, c), so it is faster
+#     than count_solutions
+#   - empty_spots is the list of the spots that are empty on the board, which
+#     are emptied again afterwards, leaving the board unchanged
+#   - make_masks must have been called on board
+def other_solution(board, r, c, v, empty_spots):
+    others = board.candidates(r, c) & ~(1 << (v - 1))
+    found = False
+    while others != 0 and not found:
+        bit = others & -others
+        others ^= bit
+        board.place_value(r, c, bit.bit_length())
+        found = board.propagate([]) and board.search("mrv", 1) > 0
+        for (r2, c2) in empty_spots:
+            if board.board[r2][c2] != 0:
+                board.remove_value(r2, c2)
+    return found
+
+
+# This class makes puzzles of each difficulty from seeds, as described
+# above, using rand as the source of random numbers, so a random.Random with
+# a set seed always makes the same puzzles
+class PuzzleGenerator():
+    def __init__(self, rand = random):
+        self.rand = rand
+        # For each difficulty, the list of (puzzle, solution, rating) seeds
+        self.seeds = {}
+        # For each difficulty, the number of puzzles that can still be made
+        # from its seeds before a new seed is needed
+        self.uses = {}
+        for level in levels:
+            self.seeds[level] = []
+            self.uses[level] = 0
+
+    # Makes a new seed, trying for the given difficulty, and keeps it with
+    # the seeds of the difficulty that it is rated at
+    def make_seed(self, level):
+        (puzzle, solution) = make_candidate(level, self.rand)
+        (rating, used) = grade_puzzle(puzzle)
+        found = rating_level(rating)
+        seeds = self.seeds[found]
+        seeds.append((puzzle, solution, rating))
+        if len(seeds) > seed_count:
+            seeds.pop(0)
+        self.uses[found] = min(self.uses[found] + reuse, reuse * len(seeds))
+
+    # Produces (puzzle, solution, rating) for the difficulty from 1 - 4,
+    # where the puzzle and solution are 81 digit strings and rating is from
+    # grade_puzzle in sudoku_grader.py
+    #   - raises a RuntimeError if no puzzle of that difficulty turns up in
+    #     max_seeds tries
+    def get_rated(self, num):
+        level = int(num)
+        tries = 0
+        while self.uses[level] == 0:
+            if tries == max_seeds:
+                raise RuntimeError("Could not make a puzzle of difficulty "
+                                   "{0}.".format(level))
+            self.make_seed(level)
+            tries += 1
+        self.uses[level] -= 1
+        (puzzle, solution, rating) = self.rand.choice(self.seeds[level])
+        transform = random_transform(self.rand)
+        return (apply_transform(puzzle, transform),
+                apply_transform(solution, transform), rating)
+
+    # Produces (puzzle, solution) for the difficulty from 1 - 4, as in
+    # get_puzzle below
+    def get_puzzle(self, num):
+        (puzzle, solution, rating) = self.get_rated(num)
+        return (puzzle, solution)
+
+
+# The PuzzleGenerator used by get_puzzle when it is not given rand
+generator = PuzzleGenerator()
+
+
+# Generates a puzzle and its solution given a difficulty from 1 - 4, as
+# 81 digit strings, in the same way as get_puzzle in sudoku_scraper.py
+#   - the puzzle is rated by sudoku_grader.py at that difficulty, as
+#     described above
+#   - rand is the source of random numbers, so a random.Random with a set
+#     seed always makes the same puzzles, but as a new PuzzleGenerator is
+#     made for it on each call, making many puzzles this way is slow, and a
+#     PuzzleGenerator should be kept instead
+def get_puzzle(num, rand = random):
+    if rand == random:
+        return generator.get_puzzle(num)
+    return PuzzleGenerator(rand).get_puzzle(num)
+
+
+# Makes a puzzle with one solution and its solution for the difficulty from
+# 1 - 4, as described above, but without checking that the puzzle is of that
+# difficulty
+def make_candidate(num, rand = random):
+    (clues, guessing) = levels[int(num)]
+    board = random_solution(rand)
+    solution = make_string(board.board)
+    board.make_masks()
+    spots = [(r, c) for r in range(9) for c in range(9)]
+    rand.shuffle(spots)
+    empty_spots = []
+    for (r, c) in spots:
+        if 81 - len(empty_spots) <= clues:
+            break
+        v = board.board[r][c]
+        board.remove_value(r, c)
+        empty_spots.append((r, c))
+        if is_single(board, r, c, v):
+            continue
+        if guessing:
+            if not other_solution(board, r, c, v, empty_spots):
+                continue
+        elif singles_solvable(board, len(empty_spots)):
+            continue
+        board.place_value(r, c, v)
+        empty_spots.pop()
+    return (make_string(board.board), solution)
+
+
+# Generates puzzles based on the user's difficulty specification
+def generate_main():
+    difficulty = str(input("What difficulty puzzle would you like?\n(Enter"
+                           " a difficulty from 1 to 4, 1 being the "
+                           "easiest): "))
+    (puz, sol) = get_puzzle(difficulty)
+    puzzle = SudokuAI(puz)
+    solution = SudokuAI(sol)
+    print("The following is a puzzle of difficulty {0}:".format(difficulty))
+    print(puzzle)
+    next = input("Press ENTER to view the solution.")
+    print(solution)
+    choice = input("Would you like to view another puzzle? (Y to view): ")
+    if choice == "Y":
+        generate_main()
+    else:
+        return
+
+
+if __name__ == "__main__":
+    generate_main()
@@ -0,0 +1,351 @@
+# Isaac Wen
+# This program rates how hard a 9x9 sudoku puzzle is for a person to solve,
+# by solving it with the techniques that people use, from the simplest to
+# the hardest, and recording which ones were needed
+
+# For the design of this program, the possible values of every spot are
+# kept as bitboards, one for each value from 1 to 9:
+#   - a bitboard is an 81 bit integer with bit (r * 9 + c) set if the value
+#     can still go at the 0-indexed spot (r, c), and every row, column and
+#     solution square is also a bitboard of its 9 spots
+#   - so most techniques are a few ANDs and ORs of whole bitboards, instead
+#     of a loop over the spots of the board
+
+# The techniques and their ratings are, from the simplest to the hardest:
+#   - hidden single (1.5): a value only fits one spot in a row, column or
+#     solution square
+#   - naked single (2.3): a spot only has one possible value
+#   - pointing (2.6): a value in a solution square only fits spots in one
+#     row or column, so it can be removed from the rest of that row or
+#     column
+#   - box-line reduction (2.8): a value in a row or column only fits spots
+#     in one solution square, so it can be removed from the rest of that
+#     solution square
+#   - naked pair (3.0) and naked triple (3.6): two (three) spots in a unit
+#     only have the same two (three) possible values between them, so those
+#     values can be removed from the rest of the unit
+#   - x-wing (3.2): a value only fits two spots in each of two rows, and
+#     they are in the same two columns, so it can be removed from the rest
+#     of those columns (and the same with rows and columns swapped)
+#   - hidden pair (3.4) and hidden triple (4.0): two (three) values only fit
+#     the same two (three) spots in a unit, so no other value can go there
+#   - guessing (10.0): none of the techniques above can go any further
+
+# After each step, the solver goes back to the simplest technique, and the
+# rating of the puzzle is the rating of the hardest technique it needed, so
+# ratings up to 2.3 need only singles, up to 4.0 need the other techniques
+# and 10.0 needs guessing
+
+# Usage:
+#   python sudoku_grader.py puzzles.txt -o ratings.txt
+
+import sys
+import argparse
+import itertools
+from sudoku_backtracking import *
+
+# The bitboards of the 9 rows, then the 9 columns, then the 9 solution
+# squares
+unit_boards = [sum(1 << i for i in unit)
+               for unit in board_shape(3).unit_indexes]
+row_boards = unit_boards[0:9]
+col_boards = unit_boards[9:18]
+box_boards = unit_boards[18:27]
+
+# For each spot, the bitboard of the 20 other spots in its row, column and
+# solution square
+peer_boards = [(row_boards[i // 9] | col_boards[i % 9] |
+                box_boards[(i // 27) * 3 + (i % 9) // 3]) & ~(1 << i)
+               for i in range(81)]
+
+# The row and column of each spot
+row_of = [i // 9 for i in range(81)]
+col_of = [i % 9 for i in range(81)]
+
+# Each pair of a solution square and a row or column that crosses it
+box_lines = [(box, line) for box in box_boards
+             for line in row_boards + col_boards
+             if box & line != 0]
+
+# The rating of each technique
+ratings = {"hidden single": 1.5,
+           "naked single": 2.3,
+           "pointing": 2.6,
+           "box-line reduction": 2.8,
+           "naked pair": 3.0,
+           "x-wing": 3.2,
+           "hidden pair": 3.4,
+           "naked triple": 3.6,
+           "hidden triple": 4.0,
+           "guessing": 10.0}
+
+
+# Produces the list of the spots set in the bitboard bits
+def spots_of(bits):
+    spots = []
+    while bits != 0:
+        low = bits & -bits
+        spots.append(low.bit_length() - 1)
+        bits ^= low
+    return spots
+
+
+# This class is a sudoku board as bitboards of the possible values of each
+# spot, along with the techniques used to fill it in
+#   - possible[v - 1] is the bitboard of the spots where v can go, and
+#     empty is the bitboard of the spots that have not been filled in
+#   - each technique returns True if it filled in a spot or removed a
+#     possible value, or False if it could not do anything
+class CandidateBoard():
+    def __init__(self, puzzle):
+        self.board = [num for row in make_nine_by_nine(puzzle) for num in row]
+        self.possible = [(1 << 81) - 1] * 9
+        self.empty = (1 << 81) - 1
+        for i in range(81):
+            if self.board[i] != 0:
+                self.place(i, self.board[i] - 1)
+
+    # Fills in the spot i with the value d + 1, removing it as a possible
+    # value from the spot's row, column and solution square
+    def place(self, i, d):
+        bit = ~(1 << i)
+        self.board[i] = d + 1
+        self.empty &= bit
+        for v in range(9):
+            self.possible[v] &= bit
+        self.possible[d] &= ~peer_boards[i]
+
+    # Produces the bitmask of the possible values of the spot i, with bit
+    # (v - 1) set if v can go there
+    def values_of(self, i):
+        values = 0
+        for d in range(9):
+            if self.possible[d] >> i & 1:
+                values |= 1 << d
+        return values
+
+    # Removes the values set in the bitmask values as possible values of
+    # the spots in the bitboard spots, and returns True if any were removed
+    def remove(self, values, spots):
+        removed = False
+        for d in range(9):
+            if values >> d & 1 and self.possible[d] & spots:
+                self.possible[d] &= ~spots
+                removed = True
+        return removed
+
+    # Returns True if some empty spot has no possible values left, so the
+    # puzzle cannot be solved from here
+    def broken(self):
+        anywhere = 0
+        for d in range(9):
+            anywhere |= self.possible[d]
+        return self.empty & ~anywhere != 0
+
+    def hidden_single(self):
+        for d in range(9):
+            for unit in unit_boards:
+                spots = self.possible[d] & unit
+                if spots != 0 and spots & (spots - 1) == 0:
+                    self.place(spots.bit_length() - 1, d)
+                    return True
+        return False
+
+    def naked_single(self):
+        # once has the spots with at least one possible value and twice has
+        # the spots with at least two
+        once = 0
+        twice = 0
+        for d in range(9):
+            twice |= once & self.possible[d]
+            once |= self.possible[d]
+        singles = once & ~twice
+        if singles == 0:
+            return False
+        i = (singles & -singles).bit_length() - 1
+        self.place(i, self.values_of(i).bit_length() - 1)
+        return True
+
+    def pointing(self):
+        for d in range(9):
+            for (box, line) in box_lines:
+                spots = self.possible[d] & box
+                if spots != 0 and spots & line == spots and \
+                        self.remove(1 << d, line & ~box):
+                    return True
+        return False
+
+    def box_line(self):
+        for d in range(9):
+            for (box, line) in box_lines:
+                spots = self.possible[d] & line
+                if spots != 0 and spots & box == spots and \
+                        self.remove(1 << d, box & ~line):
+                    return True
+        return False
+
+    # Looks for size spots in a unit that only have size possible values
+    # between them
+    def naked_subset(self, size):
+        for unit in unit_boards:
+            cells = []
+            for i in spots_of(unit & self.empty):
+                values = self.values_of(i)
+                if values.bit_count() <= size:
+                    cells.append((i, values))
+            for subset in itertools.combinations(cells, size):
+                values = 0
+                spots = 0
+                for (i, cell_values) in subset:
+                    values |= cell_values
+                    spots |= 1 << i
+                if values.bit_count() == size and \
+                        self.remove(values, unit & ~spots):
+                    return True
+        return False
+
+    # Looks for size values in a unit that only fit size spots between them
+    def hidden_subset(self, size):
+        for unit in unit_boards:
+            digits = []
+            for d in range(9):
+                spots = self.possible[d] & unit
+                if 0 < spots.bit_count() <= size:
+                    digits.append((d, spots))
+            for subset in itertools.combinations(digits, size):
+                values = 0
+                spots = 0
+                for (d, digit_spots) in subset:
+                    values |= 1 << d
+                    spots |= digit_spots
+                if spots.bit_count() == size and \
+                        self.remove(((1 << 9) - 1) & ~values, spots):
+                    return True
+        return False
+
+    def naked_pair(self):
+        return self.naked_subset(2)
+
+    def naked_triple(self):
+        return self.naked_subset(3)
+
+    def hidden_pair(self):
+        return self.hidden_subset(2)
+
+    def hidden_triple(self):
+        return self.hidden_subset(3)
+
+    def x_wing(self):
+        for d in range(9):
+            possible = self.possible[d]
+            for (bases, covers, cover_of) in ((row_boards, col_boards, col_of),
+                                              (col_boards, row_boards, row_of)):
+                # The first base line found for each pair of cover lines
+                seen = {}
+                for base in bases:
+                    spots = possible & base
+                    if spots.bit_count() != 2:
+                        continue
+                    (i, j) = spots_of(spots)
+                    pair = (cover_of[i], cover_of[j])
+                    if pair not in seen:
+                        seen[pair] = base
+                        continue
+                    cover = covers[pair[0]] | covers[pair[1]]
+                    if self.remove(1 << d, cover & ~(base | seen[pair])):
+                        return True
+        return False
+
+    # Produces the board as a string of 81 digits
+    def to_string(self):
+        return "".join([str(num) for num in self.board])
+
+
+# The techniques in the order that they are tried, with the CandidateBoard
+# function for each
+techniques = [("hidden single", CandidateBoard.hidden_single),
+              ("naked single", CandidateBoard.naked_single),
+              ("pointing", CandidateBoard.pointing),
+              ("box-line reduction", CandidateBoard.box_line),
+              ("naked pair", CandidateBoard.naked_pair),
+              ("x-wing", CandidateBoard.x_wing),
+              ("hidden pair", CandidateBoard.hidden_pair),
+              ("naked triple", CandidateBoard.naked_triple),
+              ("hidden triple", CandidateBoard.hidden_triple)]
+
+
+# Rates the 81 digit puzzle, and returns (rating, used) where used is a
+# dictionary of the number of times each technique was needed
+#   - if the techniques cannot solve the puzzle, used has "guessing" and the
+#     rating is 10.0
+#   - raises a ValueError if the puzzle breaks the rules of sudoku
+def grade_puzzle(puzzle):
+    if len(puzzle) != 81:
+        raise ValueError("not a puzzle of 81 digits")
+    if SudokuBoard(puzzle).board_good() == False:
+        raise ValueError("the puzzle has duplicate numbers")
+    board = CandidateBoard(puzzle)
+    used = {}
+    rating = 0.0
+    while board.empty != 0 and not board.broken():
+        for (name, technique) in techniques:
+            if technique(board):
+                used[name] = used.get(name, 0) + 1
+                rating = max(rating, ratings[name])
+                break
+        else:
+            break
+    if board.empty != 0:
+        used["guessing"] = 1
+        rating = ratings["guessing"]
+    return (rating, used)
+
+
+# Produces the difficulty from 1 to 4 for a rating, in the same sense as the
+# difficulties of get_puzzle: 1 needs only hidden singles, 2 needs only
+# singles, 3 needs the other techniques and 4 needs guessing
+def rating_level(rating):
+    if rating <= ratings["hidden single"]:
+        return 1
+    elif rating <= ratings["naked single"]:
+        return 2
+    elif rating < ratings["guessing"]:
+        return 3
+    return 4
+
+
+# Rates every puzzle in a file, one 81 digit puzzle per line, writing each
+# puzzle followed by its rating and the techniques it needed
+def grader_main(argv = None):
+    parser = argparse.ArgumentParser(
+        description="Rate sudoku puzzles by the techniques they need.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="file of puzzles, or - for the standard input")
+    parser.add_argument("-o", "--output", default="-",
+                        help="file for the ratings, or - for the standard "
+                             "output")
+    args = parser.parse_args(argv)
+    infile = sys.stdin if args.input == "-" else open(args.input)
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for (line_num, line) in enumerate(infile, 1):
+            puzzle = line.strip().replace(".", "0")
+            if puzzle == "":
+                continue
+            try:
+                (rating, used) = grade_puzzle(puzzle)
+            except ValueError as error:
+                sys.stderr.write("line {0}: {1}\n".format(line_num, error))
+                continue
+            outfile.write("{0} {1:.1f} {2}\n".format(
+                puzzle, rating, ",".join([name for name in ratings
+                                          if name in used])))
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+
+
+if __name__ == "__main__":
+    grader_main()
@@ -0,0 +1,316 @@
+# Isaac Wen
+# This program gets many sudoku puzzles from nine.websudoku.com at the same
+# time using asyncio, instead of one at a time with get_html in
+# sudoku_scraper.py, and adds them to the puzzle store in sudoku_store.py
+
+# For the design of this program, each puzzle is fetched by its own task:
+#   - at most concurrency pages are being fetched at once, and the requests
+#     to each host are spaced out so that there are at most rate of them per
+#     second
+#   - a request that fails, that gets an answer that is not a proper HTTP
+#     response, or that the site answers with an error that may not happen
+#     again (such as 429 or 503), is tried again up to retries
+#     times, waiting backoff seconds before the first retry and twice as
+#     long before each retry after that
+#   - each page is read with get_sol and mask_sol from sudoku_scraper.py,
+#     rated with sudoku_grader.py and added to the store batch_size puzzles
+#     at a time, and the puzzles not yet added when the harvest stops, even
+#     because of an error, are added as well
+
+#   - the pages are fetched with a small HTTP client written on asyncio
+#     streams, so no other packages are needed
+#   - the site to fetch from can be changed with base_url, and serve_pages
+#     runs a stand-in site on this computer that gives out recorded pages,
+#     so the harvester can be tried without using the real site
+
+# Usage:
+#   python sudoku_harvester.py --levels 1 2 3 4 --count 2500
+#   python sudoku_harvester.py --serve recorded_pages --port 8000
+#   python sudoku_harvester.py --count 100 --base-url http://127.0.0.1:8000/
+
+import os
+import ssl
+import sys
+import random
+import asyncio
+import argparse
+import urllib.parse
+from sudoku_scraper import get_sol, mask_sol
+from sudoku_grader import grade_puzzle
+from sudoku_store import PuzzleStore
+
+# The site that puzzles are fetched from by default
+default_url = "https://nine.websudoku.com/"
+
+# Status codes that mean the request may work if it is tried again
+retry_statuses = [429, 500, 502, 503, 504]
+
+
+# This class is raised when a page could not be fetched, even after
+# retrying
+class HarvestError(Exception):
+    pass
+
+
+# Fetches url with an HTTP GET request, and returns the pair (status code,
+# body of the response as text)
+#   - raises an OSError if the connection fails, asyncio.TimeoutError if
+#     any step takes longer than timeout seconds, or a ValueError (or
+#     asyncio.LimitOverrunError for a header that is too long) if the
+#     answer is not a proper HTTP response
+async def http_get(url, timeout = 30):
+    parts = urllib.parse.urlsplit(url)
+    secure = parts.scheme == "https"
+    port = parts.port or (443 if secure else 80)
+    path = parts.path or "/"
+    if parts.query != "":
+        path = path + "?" + parts.query
+    (reader, writer) = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, port,
+                                ssl=ssl.create_default_context()
+                                if secure else None), timeout)
+    try:
+        request = ("GET {0} HTTP/1.1\r\n"
+                   "Host: {1}\r\n"
+                   "User-Agent: sudoku-harvester\r\n"
+                   "Connection: close\r\n\r\n").format(path, parts.netloc)
+        writer.write(request.encode("ascii"))
+        await writer.drain()
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            status = int(lines[0].split()[1])
+        except (IndexError, ValueError):
+            raise ValueError("bad status line " + repr(lines[0]))
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                (name, value) = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        body = await asyncio.wait_for(reader.read(), timeout)
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = unchunk(body)
+    finally:
+        writer.close()
+    return (status, body.decode("utf-8", "replace"))
+
+
+# Joins the body of a response sent with chunked transfer encoding back
+# together
+#   - raises a ValueError if a chunk size cannot be read
+def unchunk(body):
+    joined = b""
+    while True:
+        (size_line, body) = body.split(b"\r\n", 1)
+        size = int(size_line.split(b";")[0], 16)
+        if size == 0:
+            return joined
+        joined = joined + body[:size]
+        body = body[size + 2:]
+
+
+# This class spaces out the requests to each host, so that no host gets
+# more than rate requests per second
+class HostLimiter():
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        # The earliest time that the next request to each host can start
+        self.next_time = {}
+
+    # Waits until a request can be made to host
+    async def wait(self, host):
+        now = asyncio.get_running_loop().time()
+        start = max(now, self.next_time.get(host, now))
+        self.next_time[host] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+# This class fetches puzzles from the site at base_url, with the limits
+# described above
+class Harvester():
+    def __init__(self, base_url = default_url, concurrency = 8, rate = 2.0,
+                 retries = 3, backoff = 1.0, timeout = 30):
+        self.base_url = base_url
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = HostLimiter(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+    # Fetches the HTML for a puzzle of the given difficulty, retrying as
+    # described above, or raises a HarvestError
+    async def get_html(self, level):
+        url = urllib.parse.urljoin(self.base_url, "?level=" + str(level))
+        host = urllib.parse.urlsplit(url).netloc
+        problem = None
+        async with self.semaphore:
+            for attempt in range(self.retries + 1):
+                if attempt > 0:
+                    # Waits a random part of the delay as well, so that
+                    # failed requests do not all retry at the same time
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    await asyncio.sleep(delay * random.uniform(1, 1.5))
+                await self.limiter.wait(host)
+                try:
+                    (status, html) = await http_get(url, self.timeout)
+                except (OSError, ValueError, asyncio.TimeoutError,
+                        asyncio.IncompleteReadError,
+                        asyncio.LimitOverrunError) as error:
+                    problem = repr(error)
+                    continue
+                if status == 200:
+                    return html
+                problem = "status " + str(status)
+                if status not in retry_statuses:
+                    break
+        raise HarvestError("level {0}: {1}".format(level, problem))
+
+    # Produces the row (puzzle, solution, source, level, rating) for
+    # PuzzleStore.add_puzzles for a puzzle of the given difficulty
+    #   - raises a HarvestError for a page that does not have a whole puzzle
+    #     on it, so that one bad page does not stop the rest of the harvest
+    async def get_puzzle(self, level):
+        html = await self.get_html(level)
+        try:
+            sol_mask = get_sol(html)
+        except IndexError:
+            raise HarvestError("level {0}: no puzzle on the page"
+                               .format(level))
+        (sol, mask) = sol_mask
+        if len(sol) != 81 or sol.strip("123456789") != "" or \
+                len(mask) != 81 or mask.strip("01") != "":
+            raise HarvestError("level {0}: the puzzle on the page is not 81 "
+                               "digits".format(level))
+        puzzle = mask_sol(sol_mask)
+        try:
+            (rating, used) = grade_puzzle(puzzle)
+        except ValueError as error:
+            raise HarvestError("level {0}: {1}".format(level, error))
+        return (puzzle, sol, "websudoku", level, rating)
+
+    # Fetches count puzzles of each of the levels and adds them to store,
+    # batch_size at a time, and returns the pair (number added, number of
+    # pages that failed)
+    #   - errors are written to errfile as they happen
+    async def harvest(self, levels, count, store, batch_size = 100,
+                      errfile = sys.stderr):
+        tasks = [asyncio.ensure_future(self.get_puzzle(level))
+                 for level in levels for i in range(count)]
+        added = 0
+        failed = 0
+        batch = []
+        try:
+            for task in asyncio.as_completed(tasks):
+                try:
+                    batch.append(await task)
+                except HarvestError as error:
+                    errfile.write(str(error) + "\n")
+                    failed += 1
+                if len(batch) >= batch_size:
+                    added += store.add_puzzles(batch)
+                    batch = []
+        finally:
+            # Keeps the puzzles fetched so far even if the harvest is
+            # stopped by an error, and stops the pages still being fetched
+            for task in tasks:
+                task.cancel()
+            added += store.add_puzzles(batch)
+        return (added, failed)
+
+
+# Runs a stand-in for the site on this computer at (host, port), giving out
+# the recorded HTML pages in pages one after another for every request,
+# until it is cancelled
+async def serve_pages(pages, host = "127.0.0.1", port = 8000):
+    next_page = [0]
+
+    async def answer(reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            page = pages[next_page[0] % len(pages)].encode("utf-8")
+            next_page[0] += 1
+            writer.write(("HTTP/1.1 200 OK\r\n"
+                          "Content-Type: text/html\r\n"
+                          "Content-Length: {0}\r\n"
+                          "Connection: close\r\n\r\n").format(len(page))
+                         .encode("ascii") + page)
+            await writer.drain()
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(answer, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+# Reads every .html file in folder as a recorded page for serve_pages
+def read_pages(folder):
+    pages = []
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".html"):
+            with open(os.path.join(folder, name), encoding="utf-8") as page:
+                pages.append(page.read())
+    return pages
+
+
+# Runs the harvester, or the stand-in site, from the command line
+def harvester_main(argv = None):
+    parser = argparse.ArgumentParser(
+        description="Fetch many puzzles at once into the puzzle store.")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 3, 4],
+                        choices=[1, 2, 3, 4], help="levels to fetch")
+    parser.add_argument("-n", "--count", type=int, default=100,
+                        help="number of puzzles to fetch for each level")
+    parser.add_argument("--base-url", default=default_url,
+                        help="site to fetch the puzzles from")
+    parser.add_argument("-c", "--concurrency", type=int, default=8,
+                        help="number of pages to fetch at once")
+    parser.add_argument("-r", "--rate", type=float, default=2.0,
+                        help="most requests per second to each host")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="times to retry a page that fails")
+    parser.add_argument("--backoff", type=float, default=1.0,
+                        help="seconds to wait before the first retry")
+    parser.add_argument("--batch-size", type=int, default=100,
+                        help="number of puzzles added to the store at once")
+    parser.add_argument("--store", default=None,
+                        help="file of the puzzle store")
+    parser.add_argument("--serve", default=None,
+                        help="instead of fetching, serve the .html files in "
+                             "this folder as a stand-in for the site")
+    parser.add_argument("--port", type=int, default=8000,
+                        help="port for --serve")
+    args = parser.parse_args(argv)
+
+    if args.serve != None:
+        pages = read_pages(args.serve)
+        if pages == []:
+            parser.error("there are no .html files in " + args.serve)
+        print("Serving {0} pages at http://127.0.0.1:{1}/".format(
+            len(pages), args.port))
+        try:
+            asyncio.run(serve_pages(pages, "127.0.0.1", args.port))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    store = PuzzleStore() if args.store == None else PuzzleStore(args.store)
+
+    async def run():
+        harvester = Harvester(args.base_url, args.concurrency, args.rate,
+                              args.retries, args.backoff)
+        return await harvester.harvest(args.levels, args.count, store,
+                                       args.batch_size)
+
+    try:
+        (added, failed) = asyncio.run(run())
+    finally:
+        store.close()
+    print("Added {0} puzzles, {1} pages failed.".format(added, failed))
+
+
+if __name__ == "__main__":
+    harvester_main()
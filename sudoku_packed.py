@@ -0,0 +1,220 @@
+# Isaac Wen
+# This program stores sudoku puzzles in a packed binary file, using half a
+# byte for each spot instead of a whole character, and reads them back from
+# the file without loading all of it into memory
+
+# For the design of this program, a packed file is a header followed by one
+# record for each puzzle:
+#   - the header is 16 bytes: the characters "SDKP", the version of the
+#     format, flags (1 if each record also has the puzzle's solution), two
+#     unused bytes and the number of puzzles as an 8 byte number
+#   - a puzzle is packed into 41 bytes, with spot i kept in byte i // 2, in
+#     the low 4 bits if i is even and the high 4 bits if i is odd
+#   - a record is the packed puzzle, followed by the packed solution if the
+#     file has solutions, so every record is the same size and the puzzle
+#     at any index can be found without reading the ones before it
+
+#   - PackedReader maps the file into memory with mmap, so only the parts
+#     that are used are read from disk, and record gives a memoryview of
+#     a record without copying it
+
+# Usage:
+#   python sudoku_packed.py pack puzzles.txt -o puzzles.sdkp
+#   python sudoku_packed.py unpack puzzles.sdkp -o puzzles.txt
+#   reader = PackedReader("puzzles.sdkp")
+#   puzzle = reader[1000000]
+
+import os
+import sys
+import mmap
+import struct
+import argparse
+from sudoku_backtracking import *
+
+# The layout of the header, and the characters it starts with
+header_format = struct.Struct("<4sBBHQ")
+magic = b"SDKP"
+version = 1
+
+# Number of bytes in a packed puzzle
+packed_size = 41
+
+# Tables for bytes.translate that move a number from 0 to 15 into the high 4
+# bits, and that take the low or high 4 bits of a byte as the characters
+# '0' to '9'
+high_table = bytes([(i << 4) & 0xFF for i in range(256)])
+low_char_table = bytes([ord("0") + (i & 15) for i in range(256)])
+high_char_table = bytes([ord("0") + (i >> 4) for i in range(256)])
+
+
+# Packs the 81 digit puzzle (where '.' may also be used for an empty spot)
+# into 41 bytes, or raises a ValueError if it is not a puzzle
+def pack_puzzle(puzzle):
+    cells = puzzle.encode("ascii").translate(digit_table)
+    if len(cells) != 81 or max(cells) > 9:
+        raise ValueError("A board must be 81 digits from 0 to 9.")
+    # The spots that go in the low and high 4 bits of each byte, joined
+    # together as one large number
+    low = int.from_bytes(cells[0::2], "little")
+    high = int.from_bytes(cells[1::2].translate(high_table), "little")
+    return (low | high).to_bytes(packed_size, "little")
+
+
+# Unpacks the 41 bytes (or a memoryview of them) from pack_puzzle back into
+# the 81 digit puzzle
+def unpack_puzzle(packed):
+    chars = bytearray(2 * packed_size)
+    chars[0::2] = bytes(packed).translate(low_char_table)
+    chars[1::2] = bytes(packed).translate(high_char_table)
+    return chars[:81].decode("ascii")
+
+
+# This class writes puzzles to a new packed file at path, and must be
+# closed (or used in a with statement) to finish the file
+#   - if with_solutions is True, every puzzle must be written with its
+#     solution
+class PackedWriter():
+    def __init__(self, path, with_solutions = False):
+        self.file = open(path, "wb")
+        self.with_solutions = with_solutions
+        self.count = 0
+        # The header is written again with the number of puzzles on close
+        self.write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_header(self):
+        flags = 1 if self.with_solutions else 0
+        self.file.write(header_format.pack(magic, version, flags, 0,
+                                           self.count))
+
+    # Adds the 81 digit puzzle, and its solution if the file has solutions
+    def write(self, puzzle, solution = None):
+        record = pack_puzzle(puzzle)
+        if self.with_solutions:
+            if solution == None:
+                raise ValueError("This file needs a solution for every "
+                                 "puzzle.")
+            record += pack_puzzle(solution)
+        self.file.write(record)
+        self.count += 1
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.write_header()
+        self.file.close()
+
+
+# This class reads the puzzles in the packed file at path, with reader[i]
+# being the 81 digit puzzle at index i and len(reader) the number of puzzles
+#   - raises a ValueError if the file is not a packed file
+class PackedReader():
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        # The size is checked before mapping the file, as an empty file
+        # cannot be mapped
+        if os.fstat(self.file.fileno()).st_size < header_format.size:
+            self.file.close()
+            raise ValueError("The file is too short to be a packed file.")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        (file_magic, file_version, flags, unused, self.count) = \
+            header_format.unpack_from(self.data, 0)
+        if file_magic != magic or file_version != version:
+            self.close()
+            raise ValueError("The file is not a packed puzzle file.")
+        self.with_solutions = flags & 1 == 1
+        self.record_size = packed_size * (2 if self.with_solutions else 1)
+        if len(self.data) < header_format.size + \
+                self.count * self.record_size:
+            self.close()
+            raise ValueError("The file is missing some of its puzzles.")
+        self.view = memoryview(self.data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        return unpack_puzzle(self.record(index)[:packed_size])
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    # Produces a memoryview of the record at index, without copying it
+    #   - the memoryview must be released before the reader is closed, as
+    #     the file cannot be unmapped while it is still in use
+    def record(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("There is no puzzle at that index.")
+        start = header_format.size + index * self.record_size
+        return self.view[start:start + self.record_size]
+
+    # Produces the 81 digit solution to the puzzle at index, or None if the
+    # file has no solutions
+    def solution(self, index):
+        if not self.with_solutions:
+            return None
+        return unpack_puzzle(self.record(index)[packed_size:])
+
+    def close(self):
+        if getattr(self, "view", None) != None:
+            self.view.release()
+        self.data.close()
+        self.file.close()
+
+
+# Packs or unpacks a file of puzzles from the command line, where each line
+# of a text file is a puzzle, optionally followed by a space and its
+# solution
+def packed_main(argv = None):
+    parser = argparse.ArgumentParser(
+        description="Convert puzzles between text and packed files.")
+    parser.add_argument("command", choices=["pack", "unpack"])
+    parser.add_argument("input", help="file to read")
+    parser.add_argument("-o", "--output", required=True,
+                        help="file to write")
+    parser.add_argument("-s", "--solutions", action="store_true",
+                        help="when packing, also pack the solution given "
+                             "after each puzzle")
+    args = parser.parse_args(argv)
+    if args.command == "pack":
+        with open(args.input) as infile, \
+                PackedWriter(args.output, args.solutions) as writer:
+            for (number, line) in enumerate(infile, 1):
+                fields = line.split()
+                if fields == []:
+                    continue
+                if args.solutions and len(fields) < 2:
+                    raise ValueError("Line {0} of {1} has no solution after "
+                                     "its puzzle.".format(number, args.input))
+                writer.write(fields[0], fields[1] if args.solutions
+                             else None)
+            count = writer.count
+    else:
+        with PackedReader(args.input) as reader, \
+                open(args.output, "w") as outfile:
+            for index in range(len(reader)):
+                line = reader[index]
+                if reader.with_solutions:
+                    line = line + " " + reader.solution(index)
+                outfile.write(line + "\n")
+            count = len(reader)
+    sys.stderr.write("Converted {0} puzzles.\n".format(count))
+
+
+if __name__ == "__main__":
+    packed_main()
@@ -0,0 +1,101 @@
+# Isaac Wen
+# This program keeps a few puzzles of each difficulty ready ahead of time,
+# so that the game can give the user a new puzzle as soon as they ask for
+# one instead of waiting for it to be made
+
+# For the design of this program, a worker thread takes puzzles from the
+# puzzle store in sudoku_store.py (which makes new ones if it needs to) and
+# puts them on a queue for each difficulty:
+#   - each queue holds at most size puzzles, and the worker fills the
+#     emptiest queue first, one puzzle at a time, so that a difficulty the
+#     user is waiting for is filled soonest
+#   - once every queue is full, the worker sleeps until a puzzle is taken
+#   - the worker has its own connection to the store, as an SQLite
+#     connection can only be used by the thread that made it
+#   - if getting a puzzle fails, such as when the store is locked by another
+#     program adding puzzles to it, the error is written to the standard
+#     error and kept in error so the game can show it, and the worker tries
+#     again after retry_delay seconds instead of stopping
+
+# Usage:
+#   prefetcher = PuzzlePrefetcher()
+#   pair = prefetcher.take(3)    # (puzzle, solution), or None if not ready
+#   prefetcher.stop()
+
+import sys
+import queue
+import threading
+from sudoku_store import PuzzleStore, store_path
+
+# Seconds to wait before trying again after getting a puzzle fails
+retry_delay = 1.0
+
+
+# This class is the worker described above, started as soon as it is made
+class PuzzlePrefetcher():
+    def __init__(self, levels = [1, 2, 3, 4], size = 3, path = store_path):
+        self.queues = {}
+        for level in levels:
+            self.queues[level] = queue.Queue(size)
+        self.path = path
+        # Set once stop is called
+        self.stopped = threading.Event()
+        # The last error from getting a puzzle, or None if the last puzzle
+        # was gotten without one
+        self.error = None
+        # Set whenever the worker may have queues to fill
+        self.wanted = threading.Event()
+        self.wanted.set()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Takes a (puzzle, solution) of the given difficulty off of its queue
+    # without waiting, or returns None if none is ready yet
+    def take(self, level):
+        try:
+            pair = self.queues[int(level)].get_nowait()
+        except queue.Empty:
+            pair = None
+        self.wanted.set()
+        return pair
+
+    # Keeps the queues filled until stop is called
+    def run(self):
+        store = None
+        try:
+            while not self.stopped.is_set():
+                self.wanted.wait()
+                self.wanted.clear()
+                while not self.stopped.is_set():
+                    levels = [level for level in self.queues
+                              if not self.queues[level].full()]
+                    if levels == []:
+                        break
+                    level = min(levels,
+                                key=lambda level: self.queues[level].qsize())
+                    try:
+                        if store == None:
+                            store = PuzzleStore(self.path)
+                        pair = store.get_puzzle(level)
+                    except Exception as error:
+                        # Any error is caught, as the worker stopping would
+                        # leave the game waiting for a puzzle forever
+                        self.error = "{0}: {1}".format(
+                            type(error).__name__, error)
+                        sys.stderr.write("Could not get a puzzle of level "
+                                         "{0}: {1}\n".format(level,
+                                                             self.error))
+                        self.stopped.wait(retry_delay)
+                        continue
+                    self.error = None
+                    self.queues[level].put(pair)
+        finally:
+            if store != None:
+                store.close()
+
+    # Stops the worker, waiting at most timeout seconds for it to finish the
+    # puzzle it is on
+    def stop(self, timeout = 5):
+        self.stopped.set()
+        self.wanted.set()
+        self.thread.join(timeout)
@@ -4,9 +4,12 @@
 
 import pygame
 import time
-from sudoku_scraper import *
+from sudoku_generator import *
 import copy
 from sudoku_backtracking import *
+from sudoku_canonical import *
+from sudoku_prefetch import *
+from sudoku_solve_worker import *
 
 # Initialize the game
 pygame.init()
@@ -30,6 +33,19 @@ rgb_grey = pygame.Color(230, 230, 230)
 rgb_blue = pygame.Color(0, 0, 255)
 rgb_red = pygame.Color(255, 0, 0)
 
+# Surfaces of the text drawn on the screen, kept by (font, text, color) so
+# that each one is only rendered once instead of on every frame
+text_surfaces = {}
+
+
+# Produces the surface for text drawn in font and color, rendering it only
+# the first time it is needed
+def render_text(font, text, color):
+    key = (font, text, tuple(color))
+    if key not in text_surfaces:
+        text_surfaces[key] = font.render(text, True, color)
+    return text_surfaces[key]
+
 # ===========================================================================
 # This section contains all the functions that make up the home page
 
@@ -71,15 +87,15 @@ home_solver_button = home_button_rects[1]
 
 # Draws the home screen text and buttons
 def draw_home():
-    home_title = home_font.render("All-in-One Sudoku", True, rgb_black)
+    home_title = render_text(home_font, "All-in-One Sudoku", rgb_black)
     screen.blit(home_title, (152, 100))
     # Draws the buttons on the home screen
     for button in home_button_rects:
         pygame.draw.rect(screen, rgb_white, button)
     # Prints the texts for the buttons on the home screen
-    button1_text = button_font.render("Try a Puzzle", True, rgb_black)
+    button1_text = render_text(button_font, "Try a Puzzle", rgb_black)
     screen.blit(button1_text, (306, 233))
-    button2_text = button_font.render("Automatic Solver", True, rgb_black)
+    button2_text = render_text(button_font, "Automatic Solver", rgb_black)
     screen.blit(button2_text, (272, 313))
 
 
@@ -93,6 +109,7 @@ def draw_home():
 # Font customization for the font of the main home page text and the home
 # page button text
 difficulty_font = pygame.font.Font('freesansbold.ttf', 25)
+loading_font = pygame.font.Font('freesansbold.ttf', 16)
 diff_button_font = pygame.font.Font('freesansbold.ttf', 45)
 
 # The desired characteristics of the buttons on the difficulty screen
@@ -135,8 +152,8 @@ diff4_button = diff_button_rects[3]
 
 # Draws the difficulty screen text and buttons
 def draw_difficulty():
-    difficulty_title = difficulty_font. \
-        render("What puzzle difficulty would you like?", True, rgb_black)
+    difficulty_title = render_text(
+        difficulty_font, "What puzzle difficulty would you like?", rgb_black)
     screen.blit(difficulty_title, (138, 250))
     # Draws the four difficulty buttons
     for button in diff_button_rects:
@@ -145,22 +162,43 @@ def draw_difficulty():
     (x, y) = diff_button_coords1
     shiftX = 14
     shiftY = 14
-    button1_text = diff_button_font.render("1", True, rgb_black)
+    button1_text = render_text(diff_button_font, "1", rgb_black)
     screen.blit(button1_text, (x + shiftX, y + shiftY))
     (x, y) = diff_button_coords2
-    button2_text = diff_button_font.render("2", True, rgb_black)
+    button2_text = render_text(diff_button_font, "2", rgb_black)
     screen.blit(button2_text, (x + shiftX, y + shiftY))
     (x, y) = diff_button_coords3
-    button3_text = diff_button_font.render("3", True, rgb_black)
+    button3_text = render_text(diff_button_font, "3", rgb_black)
     screen.blit(button3_text, (x + shiftX, y + shiftY))
     (x, y) = diff_button_coords4
-    button4_text = diff_button_font.render("4", True, rgb_black)
+    button4_text = render_text(diff_button_font, "4", rgb_black)
     screen.blit(button4_text, (x + shiftX, y + shiftY))
 
 
 # Desired difficulty by the user, determined through which button they
 # pressed
 user_difficulty = 0
+
+
+# Draws the text shown while waiting for a puzzle of the chosen difficulty,
+# along with the error from puzzle_prefetcher if getting one has failed
+def draw_loading():
+    loading_text = render_text(
+        difficulty_font,
+        "Loading a puzzle of difficulty {0}...".format(user_difficulty),
+        rgb_black)
+    screen.blit(loading_text, (160, 250))
+    error = puzzle_prefetcher.error
+    if error != None:
+        error_text = render_text(loading_font,
+                                 "Could not get a puzzle, trying again:",
+                                 rgb_red)
+        screen.blit(error_text, (160, 300))
+        # Only the start of a long error fits on the screen
+        error_text = render_text(loading_font, error[:70], rgb_red)
+        screen.blit(error_text, (160, 325))
+
+
 # END =======================================================================
 
 
@@ -180,6 +218,13 @@ tile_size2 = tile_margin + tile_size  # Size of one tile + margin
 num_font = pygame.font.Font('freesansbold.ttf', 32)
 solution_font = pygame.font.Font('freesansbold.ttf', 12)
 
+# Renders every digit in the colors that the board uses ahead of time
+for n in "123456789":
+    for color in [rgb_black, rgb_blue, rgb_red]:
+        render_text(num_font, n, color)
+    for color in [rgb_black, rgb_red]:
+        render_text(solution_font, n, color)
+
 
 # Draws the background for the sudoku board
 def draw_board_background():
@@ -253,7 +298,7 @@ def draw_nums(str_num, loc):
         if int(n) == 0:
             continue
         (x, y) = loc[i]
-        num = num_font.render(n, True, rgb_black)
+        num = render_text(num_font, n, rgb_black)
         # Draws all of the non-zero numbers from the list of digits, with
         # a x,y shift that makes the number placement in the tiles look
         # decent
@@ -289,16 +334,22 @@ def draw_solution(str_num, dict_coords, user_tries):
         n_user = user_tries[index]
         (x, y) = dict_coords[index]
         if n == n_user:
-            num = solution_font.render(n, True, rgb_black)
+            num = render_text(solution_font, n, rgb_black)
         else:
-            num = solution_font.render(n, True, rgb_red)
+            num = render_text(solution_font, n, rgb_red)
         screen.blit(num, (x + 35, y + 36))
     return
 
 
-# Generates a puzzle and solution of difficulty specified by the user
-def generate_puzzle(num):
-    (puzzle, solution) = get_puzzle(num)
+# Keeps a few puzzles of each difficulty ready in the background, taken
+# from the puzzle store, so that a new puzzle does not freeze the window
+puzzle_prefetcher = PuzzlePrefetcher()
+
+
+# Sets up a puzzle and solution taken from puzzle_prefetcher for the
+# interactive sudoku puzzle
+def generate_puzzle(puzzle_solution):
+    (puzzle, solution) = puzzle_solution
     user_tries = puzzle
     zero_coords = get_zeros(puzzle, coords, 'f')
     coords_zeros = get_zeros(puzzle, coords, 'b')
@@ -354,7 +405,7 @@ def display_user_input(user_tries, zero_coords, text_color):
             continue
         # This is the same drawing scheme as in draw_nums
         (x, y) = zero_coords[index]
-        num = num_font.render(n, True, text_color)
+        num = render_text(num_font, n, text_color)
         screen.blit(num, (x + tile_digitX, y + tile_digitY))
 
 
@@ -411,13 +462,13 @@ sudoku_sbutton3 = copy.copy(s_button3)  # The Quit Button
 # Draws the sidebar buttons and text for the interactive sudoku puzzle
 def draw_sudoku_sidebar():
     pygame.draw.rect(screen, rgb_white, sudoku_sbutton1)
-    text1 = sidebar_font.render('New Puzzle', True, rgb_black)
+    text1 = render_text(sidebar_font, 'New Puzzle', rgb_black)
     screen.blit(text1, (sidebarX + 40, sidebarY_list[0] + sidebar_shiftY))
     pygame.draw.rect(screen, rgb_white, sudoku_sbutton2)
-    text2 = sidebar_font.render('See Solution', True, rgb_black)
+    text2 = render_text(sidebar_font, 'See Solution', rgb_black)
     screen.blit(text2, (sidebarX + 34, sidebarY_list[1] + sidebar_shiftY))
     pygame.draw.rect(screen, rgb_white, sudoku_sbutton3)
-    text3 = sidebar_font.render('Quit', True, rgb_black)
+    text3 = render_text(sidebar_font, 'Quit', rgb_black)
     screen.blit(text3, (sidebarX + 75, sidebarY_list[2] + sidebar_shiftY))
 
 
@@ -430,10 +481,10 @@ solution_sbutton2 = copy.copy(s_button3)
 # Draws the sidebar buttons and text for the interact solution display
 def draw_solution_sidebar():
     pygame.draw.rect(screen, rgb_white, solution_sbutton1)
-    text1 = sidebar_font.render('New Puzzle', True, rgb_black)
+    text1 = render_text(sidebar_font, 'New Puzzle', rgb_black)
     screen.blit(text1, (sidebarX + 40, sidebarY_list[0] + sidebar_shiftY))
     pygame.draw.rect(screen, rgb_white, solution_sbutton2)
-    text3 = sidebar_font.render('Quit', True, rgb_black)
+    text3 = render_text(sidebar_font, 'Quit', rgb_black)
     screen.blit(text3, (sidebarX + 75, sidebarY_list[2] + sidebar_shiftY))
 
 
@@ -445,10 +496,25 @@ solver_sbutton2 = copy.copy(s_button3)
 # Draws the sidebar buttons and text for the interact solution display
 def draw_solver_sidebar():
     pygame.draw.rect(screen, rgb_white, solver_sbutton1)
-    text1 = sidebar_font.render('Find Solution', True, rgb_black)
+    text1 = render_text(sidebar_font, 'Find Solution', rgb_black)
     screen.blit(text1, (sidebarX + 33, sidebarY_list[0] + sidebar_shiftY))
     pygame.draw.rect(screen, rgb_white, solver_sbutton2)
-    text3 = sidebar_font.render('Quit', True, rgb_black)
+    text3 = render_text(sidebar_font, 'Quit', rgb_black)
+    screen.blit(text3, (sidebarX + 75, sidebarY_list[2] + sidebar_shiftY))
+
+
+# Constants for the copies of the sidebar buttons in the solving display
+solving_sbutton1 = copy.copy(s_button1)  # The Cancel Button
+solving_sbutton2 = copy.copy(s_button3)
+
+
+# Draws the sidebar buttons and text for the solving display
+def draw_solving_sidebar():
+    pygame.draw.rect(screen, rgb_white, solving_sbutton1)
+    text1 = render_text(sidebar_font, 'Cancel', rgb_black)
+    screen.blit(text1, (sidebarX + 63, sidebarY_list[0] + sidebar_shiftY))
+    pygame.draw.rect(screen, rgb_white, solving_sbutton2)
+    text3 = render_text(sidebar_font, 'Quit', rgb_black)
     screen.blit(text3, (sidebarX + 75, sidebarY_list[2] + sidebar_shiftY))
 
 
@@ -461,10 +527,10 @@ solver_solution_sbutton2 = copy.copy(s_button3)
 # Draws the sidebar buttons and text for the solver solution display
 def draw_solver_solution_sidebar():
     pygame.draw.rect(screen, rgb_white, solver_solution_sbutton1)
-    text1 = sidebar_font.render('Solve Another', True, rgb_black)
+    text1 = render_text(sidebar_font, 'Solve Another', rgb_black)
     screen.blit(text1, (sidebarX + 33, sidebarY_list[0] + sidebar_shiftY))
     pygame.draw.rect(screen, rgb_white, solver_solution_sbutton2)
-    text3 = sidebar_font.render('Quit', True, rgb_black)
+    text3 = render_text(sidebar_font, 'Quit', rgb_black)
     screen.blit(text3, (sidebarX + 75, sidebarY_list[2] + sidebar_shiftY))
 
 
@@ -499,26 +565,26 @@ def solver_constants():
     return (coords_zero, zero_coords, user_tries)
 
 
-# Turns a 9x9 matrix of num into a string of 81 num
-#   - undos the matrix creation by sudoku.py
-def undo_matrix(matrix):
-    num_str = ""
-    for row in matrix:
-        for num in row:
-            num_str = num_str + str(num)
-    return num_str
+# Number of seconds the solver is given before it gives up on a puzzle
+#   - the user can also cancel the solver sooner, as it runs in another
+#     process while the window keeps being drawn
+solver_time_limit = 60
 
 
-# Generates the solution to a given puzzle, if there is one, and masks it so
-# that all numbers in the original puzzle are 0's in the solution
-#   - if there is no solution, return False
+# Solves the puzzles entered in the solver in another process, keeping
+# their solutions by their canonical form so that entering the same puzzle
+# again, or one that is the same up to the symmetries of sudoku, does not
+# solve it again
+solve_worker = SolveWorker(SolveCache(), "mrv", solver_time_limit)
+
+
+# Starts generating the solution to a given puzzle, which is checked on
+# with solve_worker.poll every frame while the 'solving' screen is shown
+#   - the solution is False if there is no solution, GAVE_UP if the
+#     solver takes longer than solver_time_limit, or a SolveError if the
+#     solver stopped with an error
 def generate_solution(puzzle):
-    user_board = SudokuAI(puzzle)
-    board_works = user_board.solve_board()
-    if not board_works:
-        return False
-    solution = undo_matrix(user_board.board)
-    return solution
+    solve_worker.start(puzzle)
 
 
 # Customize the error message text
@@ -529,9 +595,46 @@ error_coords = (513, 350)
 # Draws an error message on the side saying that there is no valid solution
 # for the entered puzzle
 def draw_error():
-    error_text1 = error_font.render('The entered puzzle',
-                                    True, rgb_black)
-    error_text2 = error_font.render('is unsolvable.', True, rgb_black)
+    error_text1 = render_text(error_font, 'The entered puzzle', rgb_black)
+    error_text2 = render_text(error_font, 'is unsolvable.', rgb_black)
+    (x, y) = error_coords
+    screen.blit(error_text1, (x + 13, y))
+    screen.blit(error_text2, (x + 40, y + 30))
+
+
+# Produces the text for the time spent so far on the entered puzzle
+def solving_time():
+    return '{0:.1f} seconds'.format(solve_worker.elapsed())
+
+
+# Draws the time spent so far on the side while the entered puzzle is being
+# solved
+def draw_solving():
+    solving_text1 = render_text(error_font, 'Solving the puzzle...',
+                                rgb_black)
+    # The time changes every frame, so it is not kept with render_text
+    solving_text2 = error_font.render(solving_time(), True, rgb_black)
+    (x, y) = error_coords
+    screen.blit(solving_text1, (x + 5, y))
+    screen.blit(solving_text2, (x + 45, y + 30))
+
+
+# Draws an error message on the side saying that the solver gave up on the
+# entered puzzle
+def draw_gave_up():
+    error_text1 = render_text(error_font, 'The entered puzzle', rgb_black)
+    error_text2 = render_text(error_font, 'took too long to solve.',
+                              rgb_black)
+    (x, y) = error_coords
+    screen.blit(error_text1, (x + 13, y))
+    screen.blit(error_text2, (x - 1, y + 30))
+
+
+# Draws an error message on the side saying that the solver stopped with an
+# error, which is written to the standard error by solve_worker
+def draw_solve_error():
+    error_text1 = render_text(error_font, 'The solver stopped', rgb_black)
+    error_text2 = render_text(error_font, 'with an error.', rgb_black)
     (x, y) = error_coords
     screen.blit(error_text1, (x + 13, y))
     screen.blit(error_text2, (x + 40, y + 30))
@@ -560,6 +663,12 @@ def display_difficulty():
     draw_difficulty()
 
 
+# The screen shown until a puzzle of the chosen difficulty is ready
+# ('loading')
+def display_loading():
+    draw_loading()
+
+
 # The screen for the interactive sudoku puzzle ('sudoku interact')
 def display_sudoku_interact(puzzle):
     draw_board_background()
@@ -586,20 +695,85 @@ def display_solver():
     draw_solver_sidebar()
 
 
+# The screen shown while the entered puzzle is being solved ('solving')
+def display_solving(user_tries, zero_coords):
+    draw_board_background()
+    draw_rects(rects)
+    draw_solving_sidebar()
+    draw_solving()
+    display_user_input(user_tries, zero_coords, rgb_black)
+
+
 # The screen for the solver's solution display ('solver solution')
 def display_solver_solution(user_tries, zero_coords, solution):
     draw_board_background()
     draw_rects(rects)
     draw_solver_solution_sidebar()
-    if solution == False:
+    if solution == GAVE_UP:
+        draw_gave_up()
+        display_user_input(user_tries, zero_coords, rgb_red)
+    elif isinstance(solution, SolveError):
+        draw_solve_error()
+        display_user_input(user_tries, zero_coords, rgb_red)
+    elif solution == False:
         draw_error()
         display_user_input(user_tries, zero_coords, rgb_red)
     else:
         draw_nums(solution, coords)
 
 
+# The whole screen, and the part of the sidebar where the messages from the
+# solver are drawn
+screen_rect = screen.get_rect()
+message_rect = pygame.Rect(500, error_coords[1], screen_width - 500, 60)
+
+
+# Produces the list of Rect on the screen that need to be drawn again to go
+# from old_frame to new_frame, where each frame is (display_state, puzzle,
+# solution, coordinates of the selected tile or None, user_tries, message
+# from the solver or from puzzle_prefetcher, or None)
+#   - the whole screen is drawn again when it changes to another display or
+#     puzzle, and otherwise only the tiles that were selected or edited and
+#     the message are, so nothing is drawn while the screen stays the same
+def changed_rects(old_frame, new_frame):
+    if old_frame == None or old_frame[:3] != new_frame[:3]:
+        return [screen_rect]
+    (old_state, old_puzzle, old_solution, old_tile, old_tries,
+     old_message) = old_frame
+    (new_state, new_puzzle, new_solution, new_tile, new_tries,
+     new_message) = new_frame
+    dirty = []
+    if old_tile != new_tile:
+        for tile in [old_tile, new_tile]:
+            if tile != None:
+                dirty.append(pygame.Rect(tile, (tile_size, tile_size)))
+    if old_tries != new_tries:
+        for i in range(81):
+            if old_tries[i] != new_tries[i]:
+                dirty.append(rects[i])
+    if old_message != new_message:
+        # The loading screen's message is not in the sidebar
+        if new_state != 'solving':
+            return [screen_rect]
+        dirty.append(message_rect)
+    return dirty
+
+
+# Most frames drawn each second, so that the loop does not use a whole CPU
+# core waiting for the user
+frame_rate = 60
+clock = pygame.time.Clock()
+
 # Presetting the ability for the user to edit tiles in the puzzle to False
 valid_tile = False
+# Presetting the puzzle and solution shown, which are set once the user
+# picks a puzzle or enters one into the solver
+puzzle = None
+solution = None
+user_tries = None
+# The last frame drawn, as described in changed_rects, or None if the whole
+# screen needs to be drawn again
+last_frame = None
 
 # Game Loop
 running = True
@@ -611,6 +785,9 @@ while running:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
+        # Draws the whole screen again if the window was covered up
+        if event.type == pygame.VIDEOEXPOSE:
+            last_frame = None
         if event.type == pygame.MOUSEBUTTONDOWN:
             # This allows the user to interact with the buttons on the home
             # screen and use those buttons to go to other screens
@@ -624,33 +801,22 @@ while running:
             # This allows the user to interact with the buttons on the
             # difficulty screen and use those buttons to go to the
             # sudoku interact screen and to choose their difficulty
+            #   - the puzzle itself is taken from puzzle_prefetcher on the
+            #     'loading' screen below, which is left as soon as one is
+            #     ready
             elif display_state == 'difficulty':
                 if diff1_button.collidepoint(mouse):
-                    display_state = 'sudoku interact'
-                    # This will generate a puzzle and solution, set the
-                    # board representing all user's edits to it equal to the
-                    # original board, and generate the corresponding
-                    # dictionaries from get_zeros for the puzzle
-                    (puzzle, solution, user_tries, zero_coords, coords_zero) \
-                        = generate_puzzle(1)
-                    # Determines if the user has selected a valid tile to
-                    # input numbers
-                    valid_tile = False
+                    display_state = 'loading'
+                    user_difficulty = 1
                 elif diff2_button.collidepoint(mouse):
-                    display_state = 'sudoku interact'
-                    (puzzle, solution, user_tries, zero_coords, coords_zero) \
-                        = generate_puzzle(2)
-                    valid_tile = False
+                    display_state = 'loading'
+                    user_difficulty = 2
                 elif diff3_button.collidepoint(mouse):
-                    display_state = 'sudoku interact'
-                    (puzzle, solution, user_tries, zero_coords, coords_zero) \
-                        = generate_puzzle(3)
-                    valid_tile = False
+                    display_state = 'loading'
+                    user_difficulty = 3
                 elif diff4_button.collidepoint(mouse):
-                    display_state = 'sudoku interact'
-                    (puzzle, solution, user_tries, zero_coords, coords_zero) \
-                        = generate_puzzle(4)
-                    valid_tile = False
+                    display_state = 'loading'
+                    user_difficulty = 4
             # Allows the user to interact with the sudoku interactive display and
             # the solver
             elif display_state == 'sudoku interact' or display_state == 'solver':
@@ -680,8 +846,9 @@ while running:
                 # Allows the user to press the sidebar buttons on the solver
                 if display_state == 'solver':
                     if solver_sbutton1.collidepoint(mouse):
-                        display_state = 'solver solution'
-                        solution = generate_solution(user_tries)
+                        display_state = 'solving'
+                        generate_solution(user_tries)
+                        valid_tile = False
                     elif solver_sbutton2.collidepoint(mouse):
                         display_state = 'home'
             # Allows the user to interact with the interact solution display
@@ -691,6 +858,15 @@ while running:
                     display_state = 'difficulty'
                 elif solution_sbutton2.collidepoint(mouse):
                     display_state = 'home'
+            # Allows the user to cancel the solver, going back to the puzzle
+            # they entered
+            elif display_state == 'solving':
+                if solving_sbutton1.collidepoint(mouse):
+                    solve_worker.cancel()
+                    display_state = 'solver'
+                elif solving_sbutton2.collidepoint(mouse):
+                    solve_worker.cancel()
+                    display_state = 'home'
             # Allows the user to interact with the solver solution display
             elif display_state == 'solver solution':
                 # Allows the user to press the sidebar buttons
@@ -729,35 +905,93 @@ while running:
             elif event.key == pygame.K_BACKSPACE:
                 user_tries = change_user_inputs(user_tries, '0', index)
 
-    # Sets the background color
-    screen.fill(rgb_grey)
-
-    # This will change the display depending on the display_state
-    if display_state == 'home':
-        display_home()
-    elif display_state == 'difficulty':
-        display_difficulty()
-    elif display_state == 'sudoku interact':
-        display_sudoku_interact(puzzle)
-        # This will highlight a tile if the user selects it, that is, will
-        # draw a tile over top of the original board
-        if valid_tile == True:
-            (x, y) = tile_coords
-            pygame.draw.rect(screen, rgb_grey, (x, y, tile_size, tile_size))
-        # This will display all of the user's inputs so far
-        display_user_input(user_tries, zero_coords, rgb_blue)
-    elif display_state == 'interact solution':
-        display_interact_solutions(puzzle, solution, user_tries)
-        display_user_input(user_tries, zero_coords, rgb_blue)
-    elif display_state == 'solver':
-        display_solver()
-        # Same code as above, will hightlight the tile if the user selects it
-        if valid_tile == True:
-            (x, y) = tile_coords
-            pygame.draw.rect(screen, rgb_grey, (x, y, tile_size, tile_size))
-        display_user_input(user_tries, zero_coords, rgb_black)
-    elif display_state == 'solver solution':
-        display_solver_solution(user_tries, zero_coords, solution)
-
-    # This will update the screen
-    pygame.display.update()
+    # Takes a puzzle of the chosen difficulty if one is ready, without
+    # waiting for one, so the window keeps responding while it loads
+    if display_state == 'loading':
+        ready = puzzle_prefetcher.take(user_difficulty)
+        if ready != None:
+            display_state = 'sudoku interact'
+            # This will set up the puzzle and solution, set the board
+            # representing all user's edits to it equal to the original
+            # board, and generate the corresponding dictionaries from
+            # get_zeros for the puzzle
+            (puzzle, solution, user_tries, zero_coords, coords_zero) = \
+                generate_puzzle(ready)
+            # Determines if the user has selected a valid tile to input
+            # numbers
+            valid_tile = False
+
+    # Shows the solution once the solver has finished, without waiting for
+    # it, so the window keeps responding while the puzzle is solved
+    if display_state == 'solving':
+        solution = solve_worker.poll()
+        if solution != None:
+            display_state = 'solver solution'
+
+    # Works out which parts of the screen have changed since the last frame
+    selected_tile = None
+    if valid_tile == True and (display_state == 'sudoku interact' or
+                               display_state == 'solver'):
+        selected_tile = tile_coords
+    message = None
+    if display_state == 'solving':
+        message = solving_time()
+    elif display_state == 'loading':
+        message = puzzle_prefetcher.error
+    frame = (display_state, puzzle, solution, selected_tile, user_tries,
+             message)
+    dirty_rects = changed_rects(last_frame, frame)
+    last_frame = frame
+
+    # Only draws the parts of the screen that have changed, if any
+    if dirty_rects != []:
+        screen.set_clip(dirty_rects[0].unionall(dirty_rects[1:]))
+
+        # Sets the background color
+        screen.fill(rgb_grey)
+
+        # This will change the display depending on the display_state
+        if display_state == 'home':
+            display_home()
+        elif display_state == 'difficulty':
+            display_difficulty()
+        elif display_state == 'loading':
+            display_loading()
+        elif display_state == 'sudoku interact':
+            display_sudoku_interact(puzzle)
+            # This will highlight a tile if the user selects it, that is,
+            # will draw a tile over top of the original board
+            if valid_tile == True:
+                (x, y) = tile_coords
+                pygame.draw.rect(screen, rgb_grey,
+                                 (x, y, tile_size, tile_size))
+            # This will display all of the user's inputs so far
+            display_user_input(user_tries, zero_coords, rgb_blue)
+        elif display_state == 'interact solution':
+            display_interact_solutions(puzzle, solution, user_tries)
+            display_user_input(user_tries, zero_coords, rgb_blue)
+        elif display_state == 'solver':
+            display_solver()
+            # Same code as above, will hightlight the tile if the user
+            # selects it
+            if valid_tile == True:
+                (x, y) = tile_coords
+                pygame.draw.rect(screen, rgb_grey,
+                                 (x, y, tile_size, tile_size))
+            display_user_input(user_tries, zero_coords, rgb_black)
+        elif display_state == 'solving':
+            display_solving(user_tries, zero_coords)
+        elif display_state == 'solver solution':
+            display_solver_solution(user_tries, zero_coords, solution)
+
+        screen.set_clip(None)
+
+        # This will update the parts of the screen that have changed
+        pygame.display.update(dirty_rects)
+
+    # Waits until it is time for the next frame
+    clock.tick(frame_rate)
+
+# Stops the background workers once the window is closed
+puzzle_prefetcher.stop()
+solve_worker.cancel()
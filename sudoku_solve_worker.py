@@ -0,0 +1,238 @@
+# Isaac Wen
+# This program solves a sudoku puzzle in a separate process, so that a
+# puzzle that takes a long time to solve does not stop the game from drawing
+# the window and answering the user in the meantime
+
+# For the design of this program, the game starts a solve with SolveWorker,
+# and then checks on it with poll once every frame:
+#   - only the puzzle itself is looked up in a SolveCache by the game, and
+#     if it is not there a new python process is started, which runs this
+#     program on the puzzle
+#   - the process first tries to solve the puzzle with a few guesses as in
+#     SolveCache.solve, and if that is not enough finds its canonical form,
+#     which can take a while, and prints it with its transform on the first
+#     line, or prints "none" instead, then prints the solution to the
+#     puzzle, "unsolvable" or "gave up" on the second line
+#   - a thread reads what the process prints, and if the canonical form is
+#     in the cache, kills the process and uses the solution from the cache
+#     instead, then puts the result on a queue, which poll reads from
+#     without waiting, so the game never has to wait for anything slower
+#     than a dictionary lookup
+#   - if the process stops without printing a solution, such as when it
+#     crashes, poll gives a SolveError with its exit code and the last line
+#     it wrote to the standard error, and everything it wrote there is
+#     passed on to the game's standard error
+#   - cancel kills the process straight away
+#   - the process runs this file with the same python as the game, instead
+#     of using multiprocessing, as a process started by multiprocessing on
+#     Windows would run all of sudoku_pygame.py again
+
+# Usage:
+#   python sudoku_solve_worker.py 530070000600195000... --time-limit 60
+#   worker = SolveWorker()
+#   worker.start(puzzle)
+#   solution = worker.poll()    # None until the solve is finished
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import tempfile
+import threading
+import subprocess
+from sudoku_backtracking import *
+from sudoku_canonical import SolveCache, cheap_nodes, apply_transform, \
+    undo_transform
+
+# This program, which the process runs
+worker_path = os.path.abspath(__file__)
+
+
+# Produces the line printed by the process for a solution as returned by
+# SolveCache.solve
+def result_line(solution):
+    if solution == GAVE_UP:
+        return "gave up"
+    elif solution == False:
+        return "unsolvable"
+    return solution
+
+
+# Produces the solution from a line printed by the process, undoing
+# result_line, or None if the line is not a result
+def read_line(line):
+    if line == "unsolvable":
+        return False
+    elif line == "gave up":
+        return GAVE_UP
+    elif len(line) == 81 and line.isdigit():
+        return line
+    return None
+
+
+# This class is given by SolveWorker.poll instead of a solution when the
+# process stops without printing one, where message says why
+#   - like GAVE_UP, it counts as False in an if statement
+class SolveError():
+    def __init__(self, message):
+        self.message = message
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "SolveError({0!r})".format(self.message)
+
+
+# Reads what process prints, as described above, and puts (solution,
+# canonical form or None, transform or None, True if the solution came from
+# cache) on results
+#   - errors is the file that the process writes its standard error to,
+#     which is closed once the process has stopped
+def read_result(process, cache, results, errors):
+    first = process.stdout.readline().split()
+    canonical = None
+    transform = None
+    if len(first) == 3 and first[0] == "canonical":
+        canonical = first[1]
+        (transposed, rows, cols, labels) = json.loads(first[2])
+        transform = (transposed, rows, cols, labels)
+        solution = cache.solutions.get(canonical)
+        if solution != None:
+            process.kill()
+            process.wait()
+            errors.close()
+            if solution != False:
+                solution = undo_transform(solution, transform)
+            results.put((solution, canonical, transform, True))
+            return
+    lines = process.stdout.read().splitlines()
+    exit_code = process.wait()
+    errors.seek(0)
+    error_text = errors.read().decode("utf-8", "replace")
+    errors.close()
+    if error_text != "":
+        sys.stderr.write(error_text)
+    solution = None
+    if lines != []:
+        solution = read_line(lines[-1].strip())
+    if solution == None:
+        error_lines = error_text.strip().splitlines()
+        solution = SolveError("the solver stopped with exit code {0}: {1}"
+                              .format(exit_code, error_lines[-1]
+                                      if error_lines != [] else
+                                      "no error message"))
+    results.put((solution, canonical, transform, False))
+
+
+# This class solves puzzles in a separate process as described above, one
+# at a time, using cache (or a new SolveCache) to remember the solutions
+#   - mode and time_limit are given to SudokuAI.solve_board
+class SolveWorker():
+    def __init__(self, cache = None, mode = "mrv", time_limit = None):
+        self.cache = SolveCache() if cache == None else cache
+        self.mode = mode
+        self.time_limit = time_limit
+        self.process = None
+        self.result = None
+        self.start_time = time.monotonic()
+
+    # Starts solving the 81 digit puzzle, cancelling the puzzle being solved
+    # before if there is one
+    def start(self, puzzle):
+        self.cancel()
+        self.puzzle = puzzle.replace(".", "0")
+        self.start_time = time.monotonic()
+        self.result = self.cache.lookup_exact(self.puzzle)
+        if self.result != None:
+            return
+        args = [sys.executable, worker_path, self.puzzle, "--mode", self.mode]
+        if self.time_limit != None:
+            args += ["--time-limit", str(self.time_limit)]
+        # The standard error goes to a file instead of a pipe, so that the
+        # process cannot get stuck writing to it while only its standard
+        # output is read
+        errors = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(args, stdout=subprocess.PIPE,
+                                        stderr=errors, text=True)
+        # A new queue for each process, so that a cancelled process cannot
+        # give its result to the next puzzle
+        self.results = queue.Queue()
+        threading.Thread(target=read_result,
+                         args=(self.process, self.cache, self.results,
+                               errors),
+                         daemon=True).start()
+
+    # Produces the 81 digit solution to the puzzle given to start, False if
+    # it is unsolvable, GAVE_UP if the solver took longer than time_limit, a
+    # SolveError if the process stopped without solving it, or None if it is
+    # still being solved (or no puzzle was started)
+    def poll(self):
+        if self.result != None or self.process == None:
+            return self.result
+        try:
+            (solution, canonical, transform, cached) = \
+                self.results.get_nowait()
+        except queue.Empty:
+            return None
+        self.process = None
+        if cached:
+            self.cache.hits += 1
+        else:
+            self.cache.misses += 1
+        if solution != GAVE_UP and not isinstance(solution, SolveError):
+            if canonical != None:
+                self.cache.remember(canonical, solution if solution == False
+                                    else apply_transform(solution,
+                                                         transform))
+            self.cache.remember(self.puzzle, solution)
+        self.result = solution
+        return self.result
+
+    # Produces the number of seconds since the last puzzle was started
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    # Stops solving the puzzle being solved, if there is one
+    def cancel(self):
+        if self.process != None:
+            self.process.kill()
+            self.process = None
+        self.result = None
+
+
+# Solves a puzzle from the command line, printing the canonical form and
+# then the solution as described above
+def solve_worker_main(argv = None):
+    parser = argparse.ArgumentParser(
+        description="Solve one sudoku puzzle, for SolveWorker.")
+    parser.add_argument("puzzle", help="81 digit puzzle")
+    parser.add_argument("-m", "--mode", default="mrv",
+                        choices=["order", "mrv", "dlx"],
+                        help="solver to use (see SudokuAI.solve_board)")
+    parser.add_argument("-t", "--time-limit", type=float, default=None,
+                        help="seconds to spend before giving up")
+    args = parser.parse_args(argv)
+    cache = SolveCache()
+    solution = cache.solve_board(args.puzzle, args.mode, args.time_limit,
+                                 cheap_nodes)
+    if solution != GAVE_UP:
+        print("none")
+        print(result_line(solution))
+        return
+    (solution, to_solve, transform) = cache.lookup(args.puzzle)
+    if transform == None:
+        print("none", flush=True)
+    else:
+        print("canonical", to_solve,
+              json.dumps(transform, separators=(",", ":")), flush=True)
+    solution = cache.solve_board(to_solve, args.mode, args.time_limit)
+    if transform != None and solution != GAVE_UP and solution != False:
+        solution = undo_transform(solution, transform)
+    print(result_line(solution))
+
+
+if __name__ == "__main__":
+    solve_worker_main()
@@ -0,0 +1,184 @@
+# Isaac Wen
+# This program keeps sudoku puzzles in a local SQLite database, so that
+# puzzles generated or scraped before can be given to the user again
+# straight away instead of being made again
+
+# For the design of this program, each puzzle is a row of the table puzzles
+# with:
+#   - id: a number given to each puzzle in the order they are added
+#   - puzzle and solution: the 81 digit puzzle and its solution, where no
+#     puzzle is kept twice
+#   - source: where the puzzle came from, such as "generator" or
+#     "websudoku"
+#   - level: the difficulty from 1 to 4, as used by get_puzzle, which is
+#     always worked out from the rating with rating_level when the rating is
+#     known, so that puzzles from every source agree on what a level means
+#   - rating: the rating from sudoku_grader.py, if it is known
+
+#   - there is an index on (level, id), so that a random puzzle of a level
+#     is picked by choosing a random id between the smallest and largest id
+#     of that level and taking the first puzzle of that level from there,
+#     without looking through the rest of the table
+#   - puzzles are added many at a time in one transaction with add_puzzles,
+#     which is much faster than adding them one at a time
+
+# Usage:
+#   python sudoku_store.py --fill 1000
+#   store = PuzzleStore()
+#   (puzzle, solution) = store.get_puzzle(3)
+
+import os
+import random
+import sqlite3
+import argparse
+import sudoku_generator
+import sudoku_grader
+
+# File that the puzzles are kept in by default
+store_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "puzzles.db")
+
+# Number of puzzles of a level that the store must have before get_puzzle
+# picks from them instead of generating a new one
+min_level_size = 100
+
+
+# This class is a database of puzzles, kept in the SQLite file at path
+class PuzzleStore():
+    def __init__(self, path = store_path):
+        self.connection = sqlite3.connect(path)
+        # Lets the game read puzzles while another program adds them
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS puzzles ("
+                "id INTEGER PRIMARY KEY, "
+                "puzzle TEXT NOT NULL UNIQUE, "
+                "solution TEXT NOT NULL, "
+                "source TEXT, "
+                "level INTEGER, "
+                "rating REAL)")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS puzzles_level "
+                "ON puzzles (level, id)")
+
+    # Adds one puzzle with its solution, source, level and rating, and
+    # returns True if it was added or False if it was already in the store
+    def add_puzzle(self, puzzle, solution, source, level, rating = None):
+        return self.add_puzzles([(puzzle, solution, source, level,
+                                  rating)]) == 1
+
+    # Adds each puzzle in rows, given as (puzzle, solution, source, level,
+    # rating), in one transaction, and returns the number of puzzles added
+    #   - rows can be any iterable, such as a generator, so that a large
+    #     number of puzzles do not need to be held in memory at once
+    #   - puzzles already in the store are skipped
+    #   - the level given is replaced by the one from the rating, if there
+    #     is a rating
+    def add_puzzles(self, rows):
+        before = self.connection.total_changes
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO puzzles "
+                "(puzzle, solution, source, level, rating) "
+                "VALUES (?, ?, ?, ?, ?)", (rated_row(row) for row in rows))
+        return self.connection.total_changes - before
+
+    # Produces the number of puzzles in the store, or only those of the
+    # given level
+    def count(self, level = None):
+        if level == None:
+            query = self.connection.execute("SELECT COUNT(*) FROM puzzles")
+        else:
+            query = self.connection.execute(
+                "SELECT COUNT(*) FROM puzzles WHERE level = ?", (level,))
+        return query.fetchone()[0]
+
+    # Produces a random (puzzle, solution) of the given level from the
+    # store, or None if there are no puzzles of that level
+    #   - puzzles that come after a gap in the ids, such as one left by
+    #     puzzles of other levels, are picked slightly more often
+    #   - the smallest and largest ids are found with separate queries, as
+    #     SQLite can only look up one of them in the index at a time
+    def random_puzzle(self, level):
+        low = self.connection.execute(
+            "SELECT MIN(id) FROM puzzles WHERE level = ?",
+            (level,)).fetchone()[0]
+        high = self.connection.execute(
+            "SELECT MAX(id) FROM puzzles WHERE level = ?",
+            (level,)).fetchone()[0]
+        if low == None:
+            return None
+        return self.connection.execute(
+            "SELECT puzzle, solution FROM puzzles "
+            "WHERE level = ? AND id >= ? ORDER BY id LIMIT 1",
+            (level, random.randint(low, high))).fetchone()
+
+    # Generates count new puzzles of the given level with sudoku_generator.py
+    # and adds them to the store, returning the number added
+    def fill(self, level, count):
+        return self.add_puzzles(generated_rows(level, count))
+
+    # Produces a random (puzzle, solution) of the given difficulty from 1 to
+    # 4, in the same way as get_puzzle in sudoku_generator.py
+    #   - until the store has min_level_size puzzles of that level, a new
+    #     puzzle is generated and added to the store instead, so that the
+    #     same few puzzles are not given over and over
+    def get_puzzle(self, num):
+        level = int(num)
+        # Only counts up to min_level_size puzzles, as counting every puzzle
+        # of a level gets slow once the store is large
+        (stored,) = self.connection.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM puzzles WHERE level = ? "
+            "LIMIT ?)", (level, min_level_size)).fetchone()
+        if stored < min_level_size:
+            rows = list(generated_rows(level, 1))
+            self.add_puzzles(rows)
+            (puzzle, solution, source, level, rating) = rows[-1]
+            return (puzzle, solution)
+        return self.random_puzzle(level)
+
+    def close(self):
+        self.connection.close()
+
+
+# Produces the row (puzzle, solution, source, level, rating) with its level
+# worked out from its rating, if it has one
+def rated_row(row):
+    (puzzle, solution, source, level, rating) = row
+    if rating != None:
+        level = sudoku_grader.rating_level(rating)
+    return (puzzle, solution, source, level, rating)
+
+
+# Produces rows of count new puzzles of the given level for add_puzzles
+def generated_rows(level, count):
+    for i in range(count):
+        (puzzle, solution, rating) = \
+            sudoku_generator.generator.get_rated(level)
+        yield rated_row((puzzle, solution, "generator", level, rating))
+
+
+# Fills the store from the command line with generated puzzles
+def store_main(argv = None):
+    parser = argparse.ArgumentParser(
+        description="Fill the local puzzle store with generated puzzles.")
+    parser.add_argument("--fill", type=int, default=100,
+                        help="number of puzzles to add for each level")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 3, 4],
+                        choices=[1, 2, 3, 4], help="levels to add puzzles of")
+    parser.add_argument("--path", default=store_path,
+                        help="file of the puzzle store")
+    args = parser.parse_args(argv)
+    store = PuzzleStore(args.path)
+    try:
+        for level in args.levels:
+            added = store.fill(level, args.fill)
+            print("Added {0} puzzles filling level {1}, which now has "
+                  "{2}.".format(added, level, store.count(level)))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    store_main()
@@ -0,0 +1,78 @@
+# Isaac Wen
+# This program checks many sudoku boards at the same time against the rules
+# of sudoku using NumPy, instead of checking them one at a time with
+# SudokuBoard.board_good
+
+# For the design of this program, a batch of N boards is a NumPy array of
+# integers with the shape (N, 9, 9), so that boards[i] is the same 9x9
+# matrix as the board of a SudokuBoard, with 0's for empty spots
+#   - to check a board, each spot is turned into 9 flags saying which value
+#     it holds, and the flags are added up over every row, column and
+#     solution square to count how many times each value appears in it
+
+import numpy as np
+
+# Number of boards checked at a time, to limit the memory used for the flags
+chunk_size = 65536
+
+
+# Takes a list of strings of 81 digits and produces the (N, 9, 9) array of
+# the boards they represent, as in make_nine_by_nine
+#   - '.' may also be used for an empty spot
+#   - raises a ValueError if any of the strings is not 81 characters long,
+#     as the boards after it would otherwise be read from the wrong spots
+def make_boards(strings):
+    strings = list(strings)
+    for (i, string) in enumerate(strings):
+        if len(string) != 81:
+            raise ValueError("Board {0} is {1} characters long instead of "
+                             "81.".format(i, len(string)))
+    data = "".join(strings).replace(".", "0").encode("ascii")
+    boards = np.frombuffer(data, dtype=np.uint8) - ord("0")
+    return boards.reshape(-1, 9, 9)
+
+
+# Produces the (N, 3, 9, 9) array of how many times each value appears in
+# each unit of each board, where [i, 0], [i, 1] and [i, 2] are indexed by
+# [row, value - 1], [column, value - 1] and [solution square, value - 1]
+def unit_counts(boards):
+    flags = (boards[:, :, :, np.newaxis] == np.arange(1, 10)).astype(np.uint8)
+    rows = flags.sum(axis=2)
+    columns = flags.sum(axis=1)
+    squares = flags.reshape(-1, 3, 3, 3, 3, 9).sum(axis=(2, 4))
+    return np.stack([rows, columns, squares.reshape(-1, 9, 9)], axis=1)
+
+
+# Produces an array of N booleans saying whether each of the N boards
+# follows the rules of sudoku, that is it only holds the values 0 to 9, and
+# none of its rows, columns or solution squares has duplicate numbers
+#   - this is the same as board_good, for many boards at a time
+def boards_good(boards):
+    boards = np.asarray(boards).reshape(-1, 9, 9)
+    results = np.empty(len(boards), dtype=bool)
+    for start in range(0, len(boards), chunk_size):
+        chunk = boards[start:start + chunk_size]
+        in_range = ((chunk >= 0) & (chunk <= 9)).all(axis=(1, 2))
+        no_duplicates = (unit_counts(chunk) <= 1).all(axis=(1, 2, 3))
+        results[start:start + chunk_size] = in_range & no_duplicates
+    return results
+
+
+# Produces an array of N booleans saying whether each of the N boards is a
+# completed solution, that is every row, column and solution square holds
+# each of the values 1 to 9 exactly once
+#   - if puzzles is given, a solution is also only correct if it agrees
+#     with all of the numbers already filled in on the matching puzzle
+def solutions_good(solutions, puzzles = None):
+    solutions = np.asarray(solutions).reshape(-1, 9, 9)
+    if puzzles is not None:
+        puzzles = np.asarray(puzzles).reshape(-1, 9, 9)
+    results = np.empty(len(solutions), dtype=bool)
+    for start in range(0, len(solutions), chunk_size):
+        chunk = solutions[start:start + chunk_size]
+        complete = (unit_counts(chunk) == 1).all(axis=(1, 2, 3))
+        if puzzles is not None:
+            givens = puzzles[start:start + chunk_size]
+            complete &= ((givens == 0) | (givens == chunk)).all(axis=(1, 2))
+        results[start:start + chunk_size] = complete
+    return results